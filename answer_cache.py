@@ -0,0 +1,177 @@
+import re
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# ----------------- Answer Cache -----------------
+# Prompts mentioning these depend on the current moment and are never cached
+TIME_SENSITIVE_WORDS = {
+    "time", "date", "day", "today", "tonight", "now", "tomorrow", "yesterday",
+    "current", "currently", "latest", "news", "recent", "recently", "live", "score",
+}
+
+# Words that don't change the meaning of a question
+FILLER_WORDS = {"please", "pls", "kindly", "hey", "copilot", "siri"}
+
+# Words that point back at earlier turns, so the question needs the conversation
+FOLLOW_UP_WORDS = {
+    "it", "its", "it's", "this", "that", "these", "those", "they", "them", "their",
+    "he", "him", "his", "she", "her", "there", "then", "also", "else", "more",
+    "again", "another", "other", "same", "previous", "earlier", "last",
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+def normalize_prompt(prompt):
+    """Cache key for a prompt: lowercase words without punctuation or filler"""
+    words = [w for w in _WORD_RE.findall(prompt.lower()) if w not in FILLER_WORDS]
+    return " ".join(words)
+
+
+def is_time_sensitive(prompt):
+    return any(word in TIME_SENSITIVE_WORDS for word in _WORD_RE.findall(prompt.lower()))
+
+
+def is_follow_up(prompt):
+    return any(word in FOLLOW_UP_WORDS for word in _WORD_RE.findall(prompt.lower()))
+
+
+def context_key(messages):
+    """Short hash of the chat messages sent before the prompt, or "" when there are none"""
+    if len(messages) <= 1:
+        return ""
+    text = "\n".join(f"{m['role']}: {m['content']}" for m in messages[:-1])
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+class AnswerCache:
+    """Two-tier cache of Groq answers keyed by the normalized prompt.
+
+    An answer given with earlier context is keyed by that context's hash as
+    well (see context_key()), so it's only reused for the same conversation.
+    The memory tier is a small LRU (OrderedDict); the disk tier is a SQLite
+    table that survives restarts. Entries expire after `ttl` seconds and each
+    tier is trimmed to its size limit, least recently used first.
+    """
+
+    def __init__(self, path="answer_cache.db", max_memory=128, max_disk=2000, ttl=7 * 24 * 3600):
+        self.path = path
+        self.max_memory = max_memory
+        self.max_disk = max_disk
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._puts = 0
+
+        self.db = None
+        try:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS answers ("
+                            "key TEXT PRIMARY KEY, answer TEXT NOT NULL, "
+                            "created REAL NOT NULL, last_used REAL NOT NULL)")
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Answer cache running in memory only: {e}")
+            self.db = None
+
+    def get(self, prompt, context="", bypass=False):
+        """Return the cached answer for a prompt asked with the given context, or None"""
+        if bypass or is_time_sensitive(prompt):
+            with self.lock:
+                self.bypassed += 1
+            return None
+
+        key = self._key(prompt, context)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                answer, created = entry
+                if now - created < self.ttl:
+                    self.memory.move_to_end(key)
+                    self.hits += 1
+                    return answer
+                del self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    answer, created = row
+                    if now - created < self.ttl:
+                        self.db.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+                        self.db.commit()
+                        self._remember(key, answer, created)
+                        self.hits += 1
+                        self.disk_hits += 1
+                        return answer
+                    self.db.execute("DELETE FROM answers WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, prompt, answer, context="", bypass=False):
+        if bypass or not answer or is_time_sensitive(prompt):
+            return
+
+        key = self._key(prompt, context)
+        now = time.time()
+        with self.lock:
+            self._remember(key, answer, now)
+            if self.db is None:
+                return
+            self.db.execute("INSERT OR REPLACE INTO answers (key, answer, created, last_used) VALUES (?, ?, ?, ?)",
+                            (key, answer, now, now))
+            self._puts += 1
+            # Trimming scans the table, so only do it every so often
+            if self._puts % 50 == 0:
+                self._evict_disk(now)
+            self.db.commit()
+
+    def _key(self, prompt, context):
+        key = normalize_prompt(prompt)
+        return f"{key} #{context}" if context else key
+
+    def _remember(self, key, answer, created):
+        self.memory[key] = (answer, created)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        self.db.execute("DELETE FROM answers WHERE created < ?", (now - self.ttl,))
+        self.db.execute("DELETE FROM answers WHERE key IN (SELECT key FROM answers "
+                        "ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_disk,))
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM answers")
+                self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+            }
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,256 @@
+import os
+import sys
+import time
+import wave
+import tempfile
+import threading
+from collections import deque
+
+import numpy as np
+
+from stats import percentile
+from vad import frame_rms, read_wav, read_label
+
+
+# ----------------- Barge-In Detection -----------------
+class BargeInDetector:
+    """Spots the user starting to talk over the assistant's own speech.
+
+    While the assistant speaks, the microphone also hears the speakers. The
+    detector gates on that known output: for the first `learn_ms` of playback
+    nothing can trigger and the loudest frame sets the echo level, which then
+    follows the echo slowly, decaying as a peak would. Only frames `echo_ratio` times
+    louder than the echo (and clearly above the room) count as the user, and
+    `onset_ms` of them in a row trigger. The echo level is kept between
+    answers, since the speaker-to-microphone path rarely changes.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, onset_ms=80, echo_ratio=2.0, learn_ms=300,
+                 echo_release_ms=2000, room_floor=None, room_ratio=2.0, min_energy=50):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_seconds = self.frame_length / float(sample_rate)
+        self.onset_frames = max(1, int(round(onset_ms / 1000.0 / self.frame_seconds)))
+        self.learn_frames = int(round(learn_ms / 1000.0 / self.frame_seconds))
+        self.echo_decay = 0.5 ** (self.frame_seconds * 1000.0 / echo_release_ms)
+        self.echo_ratio = echo_ratio
+        self.room_floor = room_floor
+        self.room_ratio = room_ratio
+        self.min_energy = min_energy
+        self.echo_level = 0.0
+        self.reset()
+
+    def reset(self):
+        """Start a new stretch of playback; the learned echo level is kept"""
+        self.triggered = False
+        self.frames = 0
+        self.trigger_frame = None  # frame index where the user's speech began
+        self._run = 0
+        self._leftover = np.empty(0, dtype=np.int16)
+
+    @property
+    def threshold(self):
+        return max(self.min_energy, (self.room_floor or 0) * self.room_ratio, self.echo_level * self.echo_ratio)
+
+    def feed(self, chunk):
+        """Process a chunk captured during playback; returns True once the user is talking"""
+        if self.triggered:
+            return True
+        samples = np.concatenate((self._leftover, np.frombuffer(chunk, dtype=np.int16)))
+        energies = frame_rms(samples, self.frame_length)
+        self._leftover = samples[len(energies) * self.frame_length:]
+
+        for i, energy in enumerate(energies):
+            index = self.frames + i
+            if index >= self.learn_frames and energy > self.threshold:
+                self._run += 1
+                if self._run >= self.onset_frames:
+                    self.triggered = True
+                    self.trigger_frame = index - self._run + 1
+                    break
+            else:
+                self._run = 0
+                self._track_echo(float(energy), learning=index < self.learn_frames)
+        self.frames += len(energies)
+        return self.triggered
+
+    def _track_echo(self, energy, learning):
+        # Jump to the peak while learning; afterwards rise slowly, so the start
+        # of the user's speech (still below the gate) can't raise it out of reach
+        if learning:
+            self.echo_level = max(self.echo_level * self.echo_decay, energy)
+        elif energy > self.echo_level:
+            self.echo_level += (energy - self.echo_level) * 0.05
+        else:
+            self.echo_level *= self.echo_decay
+
+
+class BargeInMonitor:
+    """Listens on the always-open microphone while the assistant speaks.
+
+    arm() when playback starts and disarm() when it ends. While armed, a
+    thread reads the microphone's ring buffer from the current chunk on and
+    feeds it to the detector; on a trigger it disarms and calls
+    on_barge_in(started), where `started` is the perf_counter time the
+    user's speech began.
+    """
+
+    def __init__(self, microphone, detector, on_barge_in, room_floor=None):
+        self.microphone = microphone
+        self.detector = detector
+        self.on_barge_in = on_barge_in
+        self.room_floor = room_floor
+        self.triggers = 0
+        self.lags = deque(maxlen=200)  # seconds from the user's first word to the trigger
+        self._armed = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="barge-in", daemon=True)
+
+    @property
+    def armed(self):
+        return self._armed.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def arm(self):
+        self._armed.set()
+
+    def disarm(self):
+        self._armed.clear()
+
+    def stop(self):
+        self._stopped.set()
+        self._armed.set()  # wake the thread so it can exit
+
+    def stats(self):
+        lags = sorted(self.lags)
+        result = {"triggers": self.triggers}
+        if lags:
+            result["lag_p50_ms"] = percentile(lags, 0.5) * 1000
+            result["lag_max_ms"] = lags[-1] * 1000
+        return result
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._armed.wait()
+            if self._stopped.is_set():
+                break
+            if not self.microphone.running:
+                self._stopped.wait(0.5)
+                continue
+            try:
+                self._watch()
+            except Exception as e:
+                print(f"⚠️ Barge-in monitor error: {e}")
+                self.disarm()
+
+    def _watch(self):
+        detector = self.detector
+        if self.room_floor is not None:
+            detector.room_floor = self.room_floor()
+        detector.reset()
+        with self.microphone.listening(preroll=False) as source:
+            while self._armed.is_set() and not self._stopped.is_set():
+                chunk = source.stream.read(source.CHUNK)
+                if not chunk:
+                    return  # microphone closed
+                if detector.feed(chunk):
+                    detected = time.perf_counter()
+                    # The trigger is only known once its chunk has been captured
+                    lag = (detector.frames - detector.trigger_frame) * detector.frame_seconds
+                    self.triggers += 1
+                    self.lags.append(lag)
+                    self.disarm()
+                    self.on_barge_in(detected - lag)
+                    return
+
+
+# ----------------- WAV Replay Harness -----------------
+def write_fixture(path, user_start, user_end, duration, rate=16000, noise=150, echo_level=1500,
+                  user_level=5000, seed=0):
+    """Synthetic playback: the assistant's voice through the speakers, optionally with the user talking over it"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * rate)) / float(rate)
+    audio = rng.normal(0, noise, len(t))
+    # The assistant: a lower voice with its own syllable rhythm, from the start
+    echo_syllables = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 3.1 * t))
+    audio += echo_level * echo_syllables * (np.sin(2 * np.pi * 140 * t) + 0.4 * np.sin(2 * np.pi * 280 * t))
+    if user_start is not None:
+        voiced = (t >= user_start) & (t < user_end)
+        syllables = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+        audio += voiced * user_level * syllables * (np.sin(2 * np.pi * 210 * t) + 0.5 * np.sin(2 * np.pi * 420 * t))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.clip(audio, -32768, 32767).astype(np.int16).tobytes())
+    label = os.path.splitext(path)[0] + ".txt"
+    if user_start is not None:
+        with open(label, "w") as f:
+            f.write(f"{user_start} {user_end}\n")
+    elif os.path.exists(label):
+        os.remove(label)
+
+
+def synthetic_fixtures(directory):
+    specs = [
+        ("echo_only", None, None, 6.0, {}),
+        ("loud_echo_only", None, None, 6.0, {"echo_level": 3000}),
+        ("user_interrupts", 2.0, 3.5, 4.0, {}),
+        ("quiet_user", 1.2, 2.5, 3.0, {"user_level": 3500}),
+        ("early_interrupt", 0.5, 1.8, 2.5, {}),
+    ]
+    paths = []
+    for i, (name, start, end, duration, options) in enumerate(specs):
+        path = os.path.join(directory, f"{name}.wav")
+        write_fixture(path, start, end, duration, seed=i, **options)
+        paths.append(path)
+    return paths
+
+
+def replay(path, chunk_size=1024, **options):
+    """Feed a WAV file through the detector chunk by chunk, as the monitor would"""
+    samples, rate = read_wav(path)
+    detector = BargeInDetector(sample_rate=rate, room_floor=150, **options)
+    trigger = None
+    for offset in range(0, len(samples), chunk_size):
+        if detector.feed(samples[offset:offset + chunk_size].tobytes()):
+            trigger = (offset + chunk_size) / float(rate)
+            break
+    label = read_label(path)
+    # Without a label file the fixture is echo only, and nothing should trigger
+    result = {"file": os.path.basename(path), "trigger": trigger, "lag_ms": None, "expected": label is not None,
+              "false_trigger": trigger is not None and (label is None or trigger < label[0])}
+    if label is not None and trigger is not None and not result["false_trigger"]:
+        result["lag_ms"] = (trigger - label[0]) * 1000
+    return result
+
+
+def run_harness(paths, **options):
+    results = [replay(path, **options) for path in paths]
+    print(f"{'fixture':<22}{'trigger s':>10}{'lag ms':>9}  result")
+    for r in results:
+        trigger = f"{r['trigger']:.2f}" if r["trigger"] is not None else "-"
+        lag = f"{r['lag_ms']:.0f}" if r["lag_ms"] is not None else "-"
+        missed = r["trigger"] is None and r["expected"]
+        verdict = "false trigger" if r["false_trigger"] else "missed" if missed else "ok"
+        print(f"{r['file']:<22}{trigger:>10}{lag:>9}  {verdict}")
+    lags = sorted(r["lag_ms"] for r in results if r["lag_ms"] is not None)
+    if lags:
+        print(f"trigger lag: mean {sum(lags) / len(lags):.0f} ms, max {lags[-1]:.0f} ms over {len(lags)} fixtures")
+    return results
+
+
+if __name__ == "__main__":
+    # python barge_in.py [fixture.wav ...]   (a "start end" .txt beside a fixture marks when the user talks)
+    # With no arguments, synthetic fixtures (the assistant's echo, with and without the user) are replayed.
+    wav_paths = sys.argv[1:]
+    if wav_paths:
+        run_harness(wav_paths)
+    else:
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            for onset in (60, 80, 120):
+                print(f"\nonset {onset} ms")
+                run_harness(synthetic_fixtures(fixture_dir), onset_ms=onset)
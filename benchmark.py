@@ -0,0 +1,350 @@
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+import tracemalloc
+import subprocess
+from contextlib import redirect_stdout
+
+from stats import percentile
+
+# Questions go to the fake Groq server, the rest are local intents
+SCRIPT = [
+    "hello",
+    "what is the tallest mountain on earth",
+    "how are you",
+    "and how long does it take to climb it",
+    "increase brightness",
+    "new conversation",
+]
+
+
+# ----------------- Recording Frontend -----------------
+def make_recorder(core):
+    class Recorder(core.Frontend):
+        """Headless frontend that timestamps each turn and counts what was shown"""
+
+        def __init__(self):
+            self.cond = threading.Condition()
+            self.turns = 0
+            self.durations = []
+            self.bubbles = 0
+            self.replies = 0
+            self.output_stopped_at = None
+            self.peak_threads = threading.active_count()
+            self._turn_started = None
+
+        def add_bubble(self, text, sender, posted_at=None):
+            with self.cond:
+                self.bubbles += 1
+                if sender == "user":
+                    self._turn_started = time.perf_counter()
+
+        def append_to_bubble(self, holder, text):
+            with self.cond:
+                self.replies += 1
+                self.cond.notify_all()
+            if not holder:
+                holder.append(text)
+                self.add_bubble(text, "copilot")
+
+        def stop_output(self):
+            self.output_stopped_at = time.perf_counter()
+
+        def turn_ended(self, turn=None):
+            with self.cond:
+                if self._turn_started is None:
+                    return  # the welcome or a mode switch, not a command
+                self.durations.append(time.perf_counter() - self._turn_started)
+                self._turn_started = None
+                self.turns += 1
+                self.peak_threads = max(self.peak_threads, threading.active_count())
+                self.cond.notify_all()
+
+        def wait_turns(self, count, timeout):
+            with self.cond:
+                return self.cond.wait_for(lambda: self.turns >= count, timeout)
+
+        def wait_replies(self, count, timeout):
+            with self.cond:
+                return self.cond.wait_for(lambda: self.replies >= count, timeout)
+
+    return Recorder()
+
+
+# ----------------- Benchmark -----------------
+def run(mode, turns, warmup, realtime, token_ms, verbose):
+    """Drive `turns` commands through the headless core; returns the report dict"""
+    workdir = tempfile.mkdtemp(prefix="copilot-bench-")
+    # The core opens its caches at import, so point them somewhere disposable first
+    os.environ["ANSWER_CACHE_PATH"] = os.path.join(workdir, "answers.db")
+    os.environ["PHRASE_CACHE_DIR"] = os.path.join(workdir, "phrases")
+    log = sys.stdout if verbose else open(os.devnull, "w", encoding="utf-8")
+
+    with redirect_stdout(log):
+        import speech_recognition as sr
+        import copilot_core as core
+        from groq_client import GroqClient
+        from fake_groq import FakeGroqServer
+        from fake_devices import (WavReplayMicrophone, ScriptedRecognizer, NullEngine, FakeDisplay, FakeMixer,
+                                  write_phrase)
+
+        speed = 1.0 if realtime else 0.0
+        server = FakeGroqServer(reply="Mount Everest is the tallest. It is 8849 metres high. "
+                                      "Most climbers take about two months.",
+                                token_delay=token_ms / 1000.0).start()
+        recorder = make_recorder(core)
+        core.frontend = recorder
+        core.speech.player = None  # no phrase-cache playback; every reply goes through the null engine
+
+        mic = WavReplayMicrophone([write_phrase(os.path.join(workdir, "phrase.wav"))], speed=speed)
+        stt = ScriptedRecognizer(SCRIPT)
+        threads_before = threading.active_count()
+        tracemalloc.start()
+        core.start_backends(engine_factory=lambda: NullEngine(speed=speed),
+                            speech_input=(sr.Recognizer(), stt, mic),
+                            groq=GroqClient("bench-key", url=server.url), display=FakeDisplay(),
+                            mixer=FakeMixer())
+        core.speech.ready.wait(5)
+        core.groq_ready.wait(5)
+        if mode == "chat":
+            core.set_mode(False)
+        core.start_after_welcome(welcome=False)
+
+        started = time.perf_counter()
+        memory_after_warmup = None
+        measured_from = 0.0
+        for i in range(turns):
+            if mode == "chat":
+                # Closed loop: the next command is typed once the previous turn is over
+                core.submit_text(SCRIPT[i % len(SCRIPT)])
+            if not recorder.wait_turns(i + 1, timeout=30):
+                break
+            if i + 1 == warmup:
+                memory_after_warmup = tracemalloc.get_traced_memory()[0]
+                measured_from = time.perf_counter()
+        elapsed = time.perf_counter() - (measured_from or started)
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        threads_end = threading.active_count()
+
+        stages = core.tracer.percentiles()
+        executor = core.command_executor.summary()
+        core.shutdown()
+        server.stop()
+
+    done = recorder.turns
+    measured = recorder.durations[warmup:] or recorder.durations
+    values = sorted(measured)
+    return {
+        "mode": mode, "turns": done, "requested": turns,
+        "throughput": len(measured) / elapsed if elapsed > 0 else 0.0,
+        "turn_ms": {"p50": percentile(values, 0.5) * 1000, "p95": percentile(values, 0.95) * 1000,
+                    "p99": percentile(values, 0.99) * 1000, "max": values[-1] * 1000 if values else 0.0},
+        "stages": stages,
+        "threads": {"before": threads_before, "peak": recorder.peak_threads, "end": threads_end},
+        "memory_kb": {"after_warmup": (memory_after_warmup or 0) / 1024, "end": memory_end / 1024,
+                      "peak": memory_peak / 1024},
+        "memory_growth_bytes_per_turn": (memory_end - (memory_after_warmup or 0)) / max(1, done - warmup),
+        "llm_requests": len(server.requests),
+        "executor": executor,
+    }
+
+
+# ----------------- Cancellation Latency -----------------
+LONG_ANSWER = " ".join(f"This is sentence number {i} of a long answer that is still streaming."
+                       for i in range(1, 41))
+
+
+def answer_threads():
+    return [thread for thread in threading.enumerate() if thread.name == "speculative-answer"]
+
+
+def run_cancel(stops, token_ms, verbose, stream=True):
+    """Press Stop All mid-answer `stops` times; returns how long each part took to go quiet.
+
+    With stream=False (GROQ_STREAM=0) the answer comes back in one piece after
+    a slow start, so each stop lands while the request is still waiting for it.
+    """
+    workdir = tempfile.mkdtemp(prefix="copilot-cancel-")
+    os.environ["ANSWER_CACHE_PATH"] = os.path.join(workdir, "answers.db")
+    os.environ["PHRASE_CACHE_DIR"] = os.path.join(workdir, "phrases")
+    os.environ["GROQ_STREAM"] = "1" if stream else "0"
+    log = sys.stdout if verbose else open(os.devnull, "w", encoding="utf-8")
+
+    with redirect_stdout(log):
+        import speech_recognition as sr
+        import copilot_core as core
+        from groq_client import GroqClient
+        from fake_groq import FakeGroqServer
+        from fake_devices import (WavReplayMicrophone, ScriptedRecognizer, NullEngine, FakeDisplay, FakeMixer,
+                                  write_phrase)
+
+        # A long answer streamed slowly and spoken in real time, so every stop
+        # lands while the request, the speech and the command are all in flight
+        server = FakeGroqServer(reply=LONG_ANSWER, token_delay=token_ms / 1000.0,
+                                delay=0.0 if stream else 2.0).start()
+        recorder = make_recorder(core)
+        core.frontend = recorder
+        core.speech.player = None
+        mic = WavReplayMicrophone([write_phrase(os.path.join(workdir, "phrase.wav"))])
+        # The next question is only heard once the stopped turn has been measured
+        stt = ScriptedRecognizer([f"question number {i} about the universe" for i in range(stops)])
+        heard = threading.Semaphore(1)
+        transcribe = stt.transcribe
+
+        def gated_transcribe(audio):
+            heard.acquire()
+            return transcribe(audio)
+        stt.transcribe = gated_transcribe
+        core.start_backends(engine_factory=lambda: NullEngine(speed=1.0),
+                            speech_input=(sr.Recognizer(), stt, mic),
+                            groq=GroqClient("bench-key", url=server.url), display=FakeDisplay(),
+                            mixer=FakeMixer())
+        core.speech.ready.wait(5)
+        core.groq_ready.wait(5)
+        core.start_after_welcome(welcome=False)
+
+        parts = {"request": [], "speech": [], "command": [], "output": []}
+        stopped = 0
+        for _ in range(stops):
+            if stream:
+                if not recorder.wait_replies(recorder.replies + 1, timeout=30):
+                    break
+            else:
+                asked = len(server.requests) + 1
+                deadline = time.perf_counter() + 30
+                while len(server.requests) < asked and time.perf_counter() < deadline:
+                    time.sleep(0.001)
+                if len(server.requests) < asked:
+                    break
+            time.sleep(random.uniform(0, 0.03))
+            pressed = time.perf_counter()
+            core.stop_chat_and_speaking()
+            if recorder.output_stopped_at is not None:
+                parts["output"].append(recorder.output_stopped_at - pressed)
+            quiet = {}
+            deadline = pressed + 5
+            while len(quiet) < 3 and time.perf_counter() < deadline:
+                now = time.perf_counter()
+                if "request" not in quiet and not answer_threads():
+                    quiet["request"] = now
+                if "speech" not in quiet and not core.speech.busy:
+                    quiet["speech"] = now
+                if "command" not in quiet and not core.command_executor.busy:
+                    quiet["command"] = now
+                time.sleep(0.0005)
+            for part, at in quiet.items():
+                parts[part].append(at - pressed)
+            stopped += 1
+            heard.release()
+
+        # A stopped answer must not be remembered or cached
+        remembered = len(core.conversation)
+        core.shutdown()
+        server.stop()
+
+    report = {"mode": "cancel", "stream": stream, "stops": stopped, "requested": stops,
+              "remembered": remembered, "ms": {}}
+    for part, values in parts.items():
+        values = sorted(values)
+        report["ms"][part] = {"count": len(values),
+                              "p50": percentile(values, 0.5) * 1000, "p95": percentile(values, 0.95) * 1000,
+                              "p99": percentile(values, 0.99) * 1000,
+                              "max": values[-1] * 1000 if values else 0.0}
+    return report
+
+
+def print_cancel_report(report, limit_ms):
+    """Print the cancellation report; returns False if a part missed `limit_ms` at p99"""
+    path = "streamed answer" if report["stream"] else "whole answer, before it arrives"
+    print(f"\ncancel ({path}): {report['stops']}/{report['requested']} stops mid-answer "
+          f"(limit p99 <= {limit_ms:.0f} ms), {report['remembered']} stopped answers remembered")
+    ok = report["stops"] == report["requested"] and report["remembered"] == 0
+    for part, stats in report["ms"].items():
+        within = stats["count"] == report["stops"] and stats["p99"] <= limit_ms
+        ok = ok and within
+        print(f"  {part:<8} n={stats['count']:<5} p50 {stats['p50']:6.2f} ms  p95 {stats['p95']:6.2f} ms  "
+              f"p99 {stats['p99']:6.2f} ms  max {stats['max']:6.2f} ms  {'✅' if within else '❌'}")
+    return ok
+
+
+def print_report(report, max_turn_around_ms=None):
+    """Print a run's report; returns False if voice mode's turn-around missed its p99 limit"""
+    print(f"\n{report['mode']} mode: {report['turns']}/{report['requested']} turns, "
+          f"{report['throughput']:.1f} turns/s after warm-up")
+    turn = report["turn_ms"]
+    print(f"  turn latency  p50 {turn['p50']:.1f} ms  p95 {turn['p95']:.1f} ms  "
+          f"p99 {turn['p99']:.1f} ms  max {turn['max']:.1f} ms")
+    for stage, stats in sorted(report["stages"].items()):
+        print(f"  {stage:<14}n={stats['count']:<5} p50 {stats['p50_ms']:7.1f} ms  "
+              f"p95 {stats['p95_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms")
+    threads = report["threads"]
+    print(f"  threads       before {threads['before']}, peak {threads['peak']}, end {threads['end']}")
+    memory = report["memory_kb"]
+    print(f"  memory        {memory['after_warmup']:.0f} KB after warm-up, {memory['end']:.0f} KB at end "
+          f"(peak {memory['peak']:.0f} KB), {report['memory_growth_bytes_per_turn']:.0f} B/turn")
+    print(f"  llm requests  {report['llm_requests']}, executor {report['executor']}")
+    if report["mode"] != "voice" or max_turn_around_ms is None:
+        return True
+
+    # Every turn but the last goes back to listening, so each one should be timed
+    stats = report["stages"].get("turn_around", {"count": 0, "p99_ms": 0.0})
+    ok = stats["count"] >= report["turns"] - 1 and stats["p99_ms"] <= max_turn_around_ms
+    print(f"  turn-around   n={stats['count']} p99 {stats['p99_ms']:.2f} ms "
+          f"(limit {max_turn_around_ms:g} ms)  {'✅' if ok else '❌'}")
+    return ok
+
+
+if __name__ == "__main__":
+    # python benchmark.py [--mode voice|chat|both] [--turns 2000] [--realtime] [--token-ms 0] [--verbose]
+    # python benchmark.py --mode cancel [--turns 200] [--max-cancel-ms 16] [--groq-stream 1|0|both]
+    # Runs the assistant without a window, microphone, SAPI or network: a replayed WAV
+    # phrase, a scripted recognizer, a null TTS engine and fake_groq.py stand in for them.
+    # The cancel mode exits with status 1 if a stop takes longer than one frame at p99, and
+    # voice mode if going back to listening after a turn takes longer than --max-turn-around-ms.
+    parser = argparse.ArgumentParser(description="Headless end-to-end benchmark of the command pipeline")
+    parser.add_argument("--mode", choices=["voice", "chat", "both", "cancel"], default="both")
+    parser.add_argument("--turns", type=int, default=2000, help="turns to run (stops, in cancel mode)")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--realtime", action="store_true", help="replay audio and speak at real-time speed")
+    parser.add_argument("--token-ms", type=float, default=0.0, help="delay between streamed LLM tokens")
+    parser.add_argument("--verbose", action="store_true", help="keep the assistant's own log output")
+    parser.add_argument("--max-cancel-ms", type=float, default=16.0, help="p99 limit for the cancel mode")
+    parser.add_argument("--max-turn-around-ms", type=float, default=50.0,
+                        help="voice mode: p99 limit from the end of a turn to listening again")
+    parser.add_argument("--groq-stream", choices=["1", "0", "both"], default="both",
+                        help="cancel mode: stop streamed answers (1), whole answers (0) or both")
+    args = parser.parse_args()
+
+    if args.mode == "both":
+        # The core is a module-level singleton, so each mode gets a fresh process
+        failed = False
+        for mode in ("voice", "chat"):
+            failed |= subprocess.run([sys.executable, __file__, "--mode", mode, "--turns", str(args.turns),
+                                      "--warmup", str(args.warmup), "--token-ms", str(args.token_ms),
+                                      "--max-turn-around-ms", str(args.max_turn_around_ms)]
+                                     + ["--realtime"] * args.realtime
+                                     + ["--verbose"] * args.verbose).returncode != 0
+        if failed:
+            sys.exit(1)
+    elif args.mode == "cancel" and args.groq_stream == "both":
+        failed = False
+        for stream in ("1", "0"):
+            failed |= subprocess.run([sys.executable, __file__, "--mode", "cancel", "--turns", str(args.turns),
+                                      "--token-ms", str(args.token_ms), "--max-cancel-ms", str(args.max_cancel_ms),
+                                      "--groq-stream", stream] + ["--verbose"] * args.verbose).returncode != 0
+        if failed:
+            sys.exit(1)
+    elif args.mode == "cancel":
+        report = run_cancel(args.turns, args.token_ms or 20.0, args.verbose, stream=args.groq_stream == "1")
+        if not print_cancel_report(report, args.max_cancel_ms):
+            sys.exit(1)
+    else:
+        report = run(args.mode, args.turns, min(args.warmup, args.turns // 2), args.realtime, args.token_ms,
+                     args.verbose)
+        if not print_report(report, args.max_turn_around_ms):
+            sys.exit(1)
@@ -0,0 +1,156 @@
+import time
+
+from level_service import LevelService, clamp
+
+
+# ----------------- Brightness Backends -----------------
+class SbcBackend:
+    """screen_brightness_control: reads the first display, writes every display"""
+
+    name = "screen_brightness_control"
+
+    def __init__(self, sbc):
+        self.sbc = sbc  # the module, or a LazyModule of it
+
+    def read(self):
+        return int(self.sbc.get_brightness()[0])
+
+    def write(self, level):
+        self.sbc.set_brightness(level)
+
+
+# ----------------- Brightness Service -----------------
+class BrightnessService(LevelService):
+    """Changes screen brightness in the background, from a cached level.
+
+    Monitors on DDC/CI can take hundreds of milliseconds per read or write,
+    so callers never touch the backend: adjust() and set() only move a
+    target and return. Requests that arrive while a change is still under
+    way just move the same target, so five "increase brightness" in a row
+    cost one read and a single ramp. Each request gives the ramp `ramp_ms`
+    to arrive, in as many steps as fit at the backend's measured write speed.
+    """
+
+    name = "brightness"
+
+    def __init__(self, backend, ramp_ms=300, min_step=2, on_error=None):
+        super().__init__(backend, on_error)
+        self.ramp_seconds = ramp_ms / 1000.0
+        self.min_step = min_step
+        self.target = None   # where the display is heading, or None when idle
+        self._ramp_end = 0.0
+        self._write_seconds = None
+
+    def adjust(self, delta):
+        """Move the target by `delta` percent; returns the new target if the level is known"""
+        with self._cond:
+            self._request()
+            if self.level is None:
+                self._deltas += delta
+                self._cond.notify_all()
+                return None
+            base = self.target if self.target is not None else self.level
+            self.target = clamp(base + delta)
+            self._ramp_end = time.perf_counter() + self.ramp_seconds
+            self._cond.notify_all()
+            return self.target
+
+    def set(self, level):
+        """Head for an absolute level, replacing any pending target"""
+        with self._cond:
+            self._request()
+            self._deltas = 0
+            self.target = clamp(level)
+            self._ramp_end = time.perf_counter() + self.ramp_seconds
+            self._cond.notify_all()
+            return self.target
+
+    def stats(self):
+        stats = super().stats()
+        with self._cond:
+            stats["write_ms"] = round(self._write_seconds * 1000, 1) if self._write_seconds else None
+        return stats
+
+    def _read_backend(self):
+        return clamp(self.backend.read())
+
+    def _apply_read(self, level):
+        self.level = level
+        if self._deltas:
+            base = self.target if self.target is not None else level
+            self.target = clamp(base + self._deltas)
+            self._deltas = 0
+            self._ramp_end = time.perf_counter() + self.ramp_seconds
+        if self.target == level:
+            self.target = None
+
+    def _pending(self):
+        return self.target is not None
+
+    def _clear(self):
+        self.target = None
+
+    def _work(self):
+        """Take one step of the ramp towards the target"""
+        with self._cond:
+            if self.target is None:
+                return
+            level, target = self.level, self.target
+            if level == target:
+                self.target = None
+                self._cond.notify_all()
+                return
+            # Split what's left into as many writes as fit in the rest of the ramp
+            write = max(self._write_seconds or 0.0, 1 / 60.0)
+            remaining = self._ramp_end - time.perf_counter()
+            steps = max(1, min(int(remaining / write), abs(target - level) // self.min_step))
+            step = (target - level) / steps
+            next_level = target if steps == 1 else clamp(level + int(round(step)))
+
+        started = time.perf_counter()
+        try:
+            self.backend.write(next_level)
+        except Exception as e:
+            self._fail(e)
+            return
+        elapsed = time.perf_counter() - started
+
+        with self._cond:
+            self.writes += 1
+            self.level = next_level
+            self._write_seconds = elapsed if self._write_seconds is None else \
+                self._write_seconds * 0.7 + elapsed * 0.3
+            if self.target == next_level:
+                self.target = None
+            ramping = self.target is not None
+            self._cond.notify_all()
+        if ramping and elapsed < 1 / 60.0:
+            time.sleep(1 / 60.0 - elapsed)  # a fast backend still ramps at about a frame per step
+
+
+if __name__ == "__main__":
+    # python brightness.py   -- five "increase brightness" in a row on a slow (DDC/CI-like) fake display
+    from fake_devices import FakeDisplay
+
+    display = FakeDisplay(level=30, delay=0.15)
+    started = time.perf_counter()
+    for _ in range(5):
+        display.write(min(display.read() + 20, 100))
+    blocking = time.perf_counter() - started
+    print(f"old, blocking:  {blocking * 1000:6.0f} ms in the command handler, "
+          f"{display.reads} reads, {display.writes} writes, level {display.level}")
+
+    display = FakeDisplay(level=30, delay=0.15)
+    service = BrightnessService(display).start()
+    service.wait_idle(5)
+    reads_before = display.reads
+    started = time.perf_counter()
+    for _ in range(5):
+        service.adjust(20)
+    handler = time.perf_counter() - started
+    service.wait_idle(10)
+    settled = time.perf_counter() - started
+    print(f"service:        {handler * 1000:6.2f} ms in the command handler, settled in {settled * 1000:.0f} ms, "
+          f"{display.reads - reads_before} reads, {display.writes} writes, level {display.level}")
+    print(f"ramp:           {display.history}")
+    service.stop()
@@ -0,0 +1,67 @@
+import time
+import threading
+
+
+# ----------------- Cancel Scope -----------------
+class CancelScope:
+    """Cancellation shared by everything working on one turn.
+
+    cancel() marks the scope and straight away runs every callback registered
+    with on_cancel(), so blocked work (a streaming HTTP read, an asyncio task,
+    a typing animation) is interrupted instead of noticing at its next check.
+    A callback added after cancel() runs immediately. A scope is never reset:
+    the next turn gets a new one, so work left over from a stopped turn stays
+    stopped. is_set()/wait() let it stand in for a threading.Event. `turn`
+    is the id of the turn it belongs to, for tracing.
+    """
+
+    def __init__(self, turn=None):
+        self.turn = turn
+        self.cancelled_at = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def on_cancel(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return callback
+        self._call(callback)
+        return callback
+
+    def remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def cancel(self):
+        """Cancel the scope; returns False if it already was"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.cancelled_at = time.perf_counter()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            self._call(callback)
+        return True
+
+    def link_task(self, task):
+        """Cancel an asyncio task, from whichever thread cancels the scope"""
+        loop = task.get_loop()
+        callback = self.on_cancel(lambda: loop.call_soon_threadsafe(task.cancel))
+        task.add_done_callback(lambda _: self.remove(callback))
+        return task
+
+    def _call(self, callback):
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠️ Cancel callback error: {e}")
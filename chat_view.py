@@ -0,0 +1,352 @@
+import bisect
+import time
+import tkinter.font as tkfont
+
+import customtkinter as ctk
+
+from stats import percentile
+
+
+# ----------------- Chat History Model -----------------
+class ChatMessage:
+    __slots__ = ("seq", "sender", "text", "shown")
+
+    def __init__(self, seq, sender, text, shown):
+        self.seq = seq
+        self.sender = sender
+        self.text = text
+        self.shown = shown  # characters revealed so far
+
+    @property
+    def visible_text(self):
+        return self.text[:self.shown]
+
+
+class ChatHistory:
+    """Compact list-backed transcript with cached row heights.
+
+    tops[i] is the y offset of message i, so finding the rows in a viewport is
+    a bisect. Messages are addressed by a running sequence number that stays
+    valid when the oldest ones are trimmed past `limit`.
+    """
+
+    def __init__(self, limit=20000):
+        self.limit = limit
+        self.messages = []
+        self.heights = []
+        self.tops = []
+        self.first_seq = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def total_height(self):
+        if not self.messages:
+            return 0
+        return self.tops[-1] + self.heights[-1]
+
+    def append(self, sender, text, height, shown=0):
+        message = ChatMessage(self.first_seq + len(self.messages), sender, text, shown)
+        self.tops.append(self.total_height)
+        self.messages.append(message)
+        self.heights.append(height)
+        return message
+
+    def index_of(self, message):
+        index = message.seq - self.first_seq
+        return index if 0 <= index < len(self.messages) else None
+
+    def index_at(self, y):
+        """Index of the message covering y (clamped to the valid range)"""
+        if not self.messages:
+            return 0
+        return max(0, min(len(self.messages) - 1, bisect.bisect_right(self.tops, y) - 1))
+
+    def set_height(self, index, height):
+        delta = height - self.heights[index]
+        if not delta:
+            return False
+        self.heights[index] = height
+        tops = self.tops
+        for i in range(index + 1, len(tops)):
+            tops[i] += delta
+        return True
+
+    def trim(self):
+        """Drop the oldest tenth once over the limit; returns the height removed"""
+        if not self.limit or len(self.messages) <= self.limit:
+            return 0
+        count = len(self.messages) - self.limit + self.limit // 10
+        removed = self.tops[count]
+        del self.messages[:count]
+        del self.heights[:count]
+        self.tops = [top - removed for top in self.tops[count:]]
+        self.first_seq += count
+        return removed
+
+
+# ----------------- Virtualized Chat View -----------------
+BUBBLE_STYLES = {
+    "copilot": {"side": "left", "justify": "left", "fg_color": "#3498db"},
+    "user": {"side": "right", "justify": "right", "fg_color": "#2ecc71"},
+}
+
+
+class _Row:
+    """One recyclable bubble row: frame, avatar label and text label"""
+
+    def __init__(self, view):
+        self.view = view
+        self.frame = ctk.CTkFrame(view.viewport, fg_color="transparent")
+        self.avatar = ctk.CTkLabel(self.frame, text="")
+        self.bubble = ctk.CTkLabel(self.frame, text="", font=view.font_spec, wraplength=view.wraplength,
+                                   text_color="white", corner_radius=12, pady=8, padx=12)
+        self.sender = None
+        self.message = None
+        self.frame.bind("<Configure>", self._on_configure)
+        for widget in (self.frame, self.avatar, self.bubble):
+            view.bind_scroll(widget)
+
+    def show(self, message, y):
+        if message.sender != self.sender:
+            self._layout(message.sender)
+        if message is not self.message or self.bubble.cget("text") != message.visible_text:
+            self.bubble.configure(text=message.visible_text)
+        self.message = message
+        self.frame.place(x=0, y=y, relwidth=1)
+
+    def hide(self):
+        self.message = None
+        self.frame.place_forget()
+
+    def _layout(self, sender):
+        style = BUBBLE_STYLES.get(sender, BUBBLE_STYLES["copilot"])
+        avatar = self.view.avatars.get(sender)
+        self.avatar.pack_forget()
+        self.bubble.pack_forget()
+        self.bubble.configure(justify=style["justify"], fg_color=style["fg_color"])
+        # Copilot: avatar then bubble from the left; user: bubble then avatar from the right
+        if sender == "copilot" and avatar:
+            self.avatar.configure(image=avatar)
+            self.avatar.pack(side="left", padx=5)
+        self.bubble.pack(side=style["side"], padx=5, pady=5)
+        if sender != "copilot" and avatar:
+            self.avatar.configure(image=avatar)
+            self.avatar.pack(side="right", padx=5)
+        self.sender = sender
+
+    def _on_configure(self, event):
+        # Correct the estimated height with the real one once Tk has laid the row out
+        if self.message is not None:
+            self.view.correct_height(self.message, event.height)
+
+
+class ChatView(ctk.CTkFrame):
+    """Virtualized chat transcript.
+
+    The whole history lives in a ChatHistory; only the rows inside the viewport
+    plus `overscan` rows either side exist as widgets, and those are recycled
+    as the view scrolls. Row heights are estimated from font metrics when a
+    message is added and corrected from the real layout when it is shown.
+    """
+
+    def __init__(self, master, width=650, height=350, wraplength=400, overscan=3, limit=20000,
+                 font=("Arial", 14), **kwargs):
+        super().__init__(master, width=width, height=height, **kwargs)
+        self.pack_propagate(False)
+        self.wraplength = wraplength
+        self.overscan = overscan
+        self.font_spec = font
+        self.font = tkfont.Font(family=font[0], size=font[1])
+        self.line_height = self.font.metrics("linespace")
+        self.avatars = {}
+        self.history = ChatHistory(limit)
+        self.offset = 0
+        self.follow_tail = True
+        self.rows = []
+        self.live = {}
+        self.frame_times = []
+        self._word_widths = {}
+        self._space_width = self.font.measure(" ")
+        self._render_pending = False
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent")
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda event: self.schedule_render())
+        self.bind_scroll(self.viewport)
+
+    def set_avatars(self, copilot=None, user=None):
+        self.avatars = {"copilot": copilot, "user": user}
+        for row in self.rows:
+            row.sender = None  # lay out again with the avatar on the next render
+            row.message = None
+        self.schedule_render()
+
+    def bind_scroll(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", lambda event: self.scroll_by(-3 * self.line_height))
+        widget.bind("<Button-5>", lambda event: self.scroll_by(3 * self.line_height))
+
+    # ----- model updates -----
+    def add_message(self, sender, text, shown=0):
+        message = self.history.append(sender, text, self.estimate_height(text), shown)
+        removed = self.history.trim()
+        if removed:
+            self.offset = max(0, self.offset - removed)
+        self.schedule_render()
+        return message
+
+    def append_text(self, message, text):
+        """Grow a message (streamed answers) and re-measure its row"""
+        message.text = f"{message.text} {text}" if message.text else text
+        index = self.history.index_of(message)
+        if index is not None and self.history.set_height(index, self.estimate_height(message.text)):
+            self.schedule_render()
+
+    def reveal(self, message, shown):
+        """Show the first `shown` characters; only touches a widget if the row is live"""
+        message.shown = shown
+        row = self.live.get(message.seq)
+        if row is not None:
+            row.bubble.configure(text=message.visible_text)
+
+    def correct_height(self, message, height):
+        index = self.history.index_of(message)
+        if index is not None and height > 1 and self.history.set_height(index, height):
+            self.schedule_render()
+
+    # ----- layout -----
+    def estimate_height(self, text):
+        """Row height of a bubble: wrapped line count times line height plus padding"""
+        widths = self._word_widths
+        lines = 0
+        for paragraph in text.split("\n"):
+            lines += 1
+            x = 0
+            for word in paragraph.split():
+                width = widths.get(word)
+                if width is None:
+                    width = widths[word] = self.font.measure(word)
+                if x and x + self._space_width + width > self.wraplength:
+                    lines += 1
+                    x = width
+                else:
+                    x += (self._space_width if x else 0) + width
+        bubble = lines * self.line_height + 2 * 8
+        return max(bubble, 40) + 2 * 5
+
+    def schedule_render(self):
+        if not self._render_pending:
+            self._render_pending = True
+            self.after_idle(self.render)
+
+    def render(self):
+        self._render_pending = False
+        started = time.perf_counter()
+        history = self.history
+        view_height = max(1, self.viewport.winfo_height())
+        total = history.total_height
+
+        if self.follow_tail:
+            self.offset = max(0, total - view_height)
+        self.offset = max(0, min(self.offset, max(0, total - view_height)))
+
+        live = {}
+        if len(history):
+            first = max(0, history.index_at(self.offset) - self.overscan)
+            last = min(len(history) - 1, history.index_at(self.offset + view_height) + self.overscan)
+            visible = history.messages[first:last + 1]
+
+            # Keep rows already showing a visible message; recycle the rest
+            wanted = {message.seq for message in visible}
+            kept = {row.message.seq: row for row in self.rows
+                    if row.message is not None and row.message.seq in wanted}
+            spare = [row for row in self.rows if row.message is None or row.message.seq not in wanted]
+            for index, message in enumerate(visible, start=first):
+                row = kept.get(message.seq)
+                if row is None:
+                    row = spare.pop() if spare else self._new_row()
+                live[message.seq] = row
+                row.show(message, history.tops[index] - self.offset)
+            for row in spare:
+                row.hide()
+        else:
+            for row in self.rows:
+                row.hide()
+        self.live = live
+
+        if total > 0:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + view_height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+        self.frame_times.append(time.perf_counter() - started)
+        del self.frame_times[:-500]
+
+    def _new_row(self):
+        row = _Row(self)
+        self.rows.append(row)
+        return row
+
+    # ----- scrolling -----
+    def scroll_by(self, pixels):
+        self.offset = max(0, self.offset + pixels)
+        bottom = self.history.total_height - self.viewport.winfo_height()
+        self.follow_tail = self.offset >= bottom
+        self.schedule_render()
+
+    def scroll_to_bottom(self):
+        self.follow_tail = True
+        self.schedule_render()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        total = self.history.total_height
+        if not args or not total:
+            return
+        if args[0] == "moveto":
+            self.offset = float(args[1]) * total
+            self.scroll_by(0)
+        elif args[0] == "scroll":
+            step = self.viewport.winfo_height() if args[2] == "pages" else 3 * self.line_height
+            self.scroll_by(int(args[1]) * step)
+
+    def _on_wheel(self, event):
+        self.scroll_by(-int(event.delta / 120) * 3 * self.line_height)
+
+
+# ----------------- Frame-time Benchmark -----------------
+def benchmark(messages=10000, frames=300):
+    """Fill the view with `messages` bubbles and time renders while scrolling"""
+    app = ctk.CTk()
+    app.geometry("700x450")
+    view = ChatView(app)
+    view.pack(pady=10)
+    app.update()
+
+    started = time.perf_counter()
+    for i in range(messages):
+        sender = "copilot" if i % 2 else "user"
+        text = f"Message {i}: " + "lorem ipsum dolor sit amet " * (1 + i % 7)
+        view.add_message(sender, text, shown=len(text))
+    app.update()
+    fill = time.perf_counter() - started
+
+    view.frame_times.clear()
+    view.follow_tail = False
+    for i in range(frames):
+        view.offset = view.history.total_height * i / frames
+        view.render()
+        app.update()
+
+    times = sorted(view.frame_times)
+    print(f"{messages} messages added in {fill:.2f}s, {len(view.rows)} live rows")
+    print(f"render p50 {percentile(times, 0.5) * 1000:.2f} ms, "
+          f"p95 {percentile(times, 0.95) * 1000:.2f} ms, max {times[-1] * 1000:.2f} ms")
+    app.destroy()
+
+
+if __name__ == "__main__":
+    benchmark()
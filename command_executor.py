@@ -0,0 +1,227 @@
+import time
+import threading
+from collections import deque
+
+from stats import percentile
+
+
+# ----------------- Command Executor -----------------
+# What submit() does when the queue is already full
+POLICY_COALESCE = "coalesce"        # merge a repeat into its newest pending copy, else drop the oldest
+POLICY_DROP_OLDEST = "drop_oldest"  # make room by discarding the oldest pending command
+POLICY_DROP_NEWEST = "drop_newest"  # reject the incoming command
+POLICY_BLOCK = "block"              # wait for room (backpressure on the producer)
+POLICIES = (POLICY_COALESCE, POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_BLOCK)
+
+
+class ExecutorStats:
+    """Counters plus rolling queue-wait and run-time samples"""
+
+    def __init__(self, window=200):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.wait_times = deque(maxlen=window)
+        self.run_times = deque(maxlen=window)
+
+    def summary(self, depth):
+        waits = sorted(self.wait_times)
+        runs = sorted(self.run_times)
+        return {
+            "depth": depth,
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "wait_p50_ms": percentile(waits, 0.5) * 1000,
+            "wait_p95_ms": percentile(waits, 0.95) * 1000,
+            "run_p50_ms": percentile(runs, 0.5) * 1000,
+            "run_p95_ms": percentile(runs, 0.95) * 1000,
+        }
+
+
+class _Task:
+    def __init__(self, command, key, context):
+        self.command = command
+        self.key = key
+        self.context = context
+        self.submitted_at = time.perf_counter()
+
+
+class CommandExecutor:
+    """Fixed pool of worker threads fed from a bounded command queue.
+
+    Each worker owns one shard of the queue and commands are sharded by key
+    (e.g. "voice" or "chat"), so commands with the same key always run one at
+    a time in the order they were submitted, as handler(command, context).
+    The total number of pending commands is capped at `max_queue`; `policy`
+    decides what happens beyond it. Every submission that will never run
+    (dropped, rejected, flushed, or merged into a later copy of itself) is
+    handed to on_drop(command, context, reason). `on_idle` is called once
+    the last running command finishes with nothing left pending.
+    """
+
+    def __init__(self, handler, workers=1, max_queue=8, policy=POLICY_COALESCE, on_idle=None, on_drop=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.handler = handler
+        self.max_queue = max(1, max_queue)
+        self.policy = policy
+        self.on_idle = on_idle
+        self.on_drop = on_drop
+        self.stats = ExecutorStats()
+
+        self._cond = threading.Condition()
+        self._shards = [deque() for _ in range(max(1, workers))]
+        self._running = 0
+        self._stopped = False
+        self._threads = [
+            threading.Thread(target=self._work, args=(i,), name=f"command-worker-{i}", daemon=True)
+            for i in range(len(self._shards))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def depth(self):
+        with self._cond:
+            return self._depth()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._running > 0 or self._depth() > 0
+
+    def _depth(self):
+        return sum(len(shard) for shard in self._shards)
+
+    def _shard_for(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    def submit(self, command, key=None, timeout=None, context=None):
+        """Queue a command; returns False if it was rejected"""
+        dropped = []
+        try:
+            with self._cond:
+                return self._submit(_Task(command, key, context), timeout, dropped)
+        finally:
+            self._dropped(dropped)
+
+    def _submit(self, task, timeout, dropped):
+        if self._stopped:
+            dropped.append((task, "stopped"))
+            return False
+        self.stats.submitted += 1
+        shard = self._shard_for(task.key)
+
+        if self._depth() >= self.max_queue:
+            if self.policy == POLICY_COALESCE:
+                # The repeat takes its newest pending copy's place at the back, so
+                # dropping the oldest doesn't lose the command it stands for
+                copy = next((t for t in reversed(shard) if t.command == task.command), None)
+                if copy is not None:
+                    shard.remove(copy)
+                    shard.append(task)
+                    self.stats.coalesced += 1
+                    dropped.append((copy, "coalesced"))
+                    self._cond.notify_all()
+                    return True
+            if self.policy == POLICY_DROP_NEWEST:
+                self.stats.dropped += 1
+                dropped.append((task, "rejected"))
+                return False
+            if self.policy == POLICY_BLOCK:
+                if not self._cond.wait_for(lambda: self._depth() < self.max_queue or self._stopped, timeout):
+                    self.stats.dropped += 1
+                    dropped.append((task, "rejected"))
+                    return False
+                if self._stopped:
+                    dropped.append((task, "stopped"))
+                    return False
+            else:
+                # Drop from this key's shard if it has anything, else from the fullest one
+                victim = shard if shard else max(self._shards, key=len)
+                oldest = victim.popleft()
+                self.stats.dropped += 1
+                dropped.append((oldest, "dropped"))
+                print(f"⚠️ Command queue full, dropped '{oldest.command}'")
+
+        shard.append(task)
+        self.stats.max_depth = max(self.stats.max_depth, self._depth())
+        self._cond.notify_all()
+        return True
+
+    def _dropped(self, dropped):
+        """Tell on_drop about submissions that won't run; called without the lock held"""
+        if not self.on_drop:
+            return
+        for task, reason in dropped:
+            try:
+                self.on_drop(task.command, task.context, reason)
+            except Exception as e:
+                print(f"⚠️ Command drop callback error: {e}")
+
+    def flush(self):
+        """Discard every pending command; returns how many were dropped"""
+        with self._cond:
+            dropped = [(task, "flushed") for shard in self._shards for task in shard]
+            for shard in self._shards:
+                shard.clear()
+            self.stats.dropped += len(dropped)
+            self._cond.notify_all()
+        self._dropped(dropped)
+        return len(dropped)
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def summary(self):
+        with self._cond:
+            return self.stats.summary(self._depth())
+
+    def _work(self, index):
+        shard = self._shards[index]
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: shard or self._stopped)
+                if self._stopped:
+                    return
+                task = shard.popleft()
+                self._running += 1
+                self._cond.notify_all()
+
+            started = time.perf_counter()
+            ok = True
+            try:
+                self.handler(task.command, task.context)
+            except Exception as e:
+                ok = False
+                print(f"❌ Command '{task.command}' failed: {e}")
+            finished = time.perf_counter()
+
+            with self._cond:
+                self._running -= 1
+                self.stats.wait_times.append(started - task.submitted_at)
+                self.stats.run_times.append(finished - started)
+                if ok:
+                    self.stats.completed += 1
+                else:
+                    self.stats.failed += 1
+                idle = self._running == 0 and self._depth() == 0
+                self._cond.notify_all()
+
+            if idle and self.on_idle:
+                try:
+                    self.on_idle()
+                except Exception as e:
+                    print(f"⚠️ Command idle callback error: {e}")
@@ -0,0 +1,171 @@
+import re
+import time
+import threading
+from collections import deque
+
+from stats import percentile
+
+
+# ----------------- Token Estimate -----------------
+_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Approximate BPE token count: words and punctuation, long words counted as several"""
+    count = 0
+    for piece in _PIECES.findall(text):
+        count += 1 + len(piece) // 8
+    return count + 4  # per-message overhead in the chat format
+
+
+def first_sentence(text, limit=160):
+    sentence = re.split(r"(?<=[.!?])\s", text.strip(), 1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit].rsplit(" ", 1)[0] + "..."
+
+
+# ----------------- Conversation Stats -----------------
+class ConversationStats:
+    """Prompt sizes and answer latencies, to tune the token budget against response time"""
+
+    def __init__(self, window=200):
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=window)  # (prompt tokens, first-output latency, total latency)
+        self.summarized = 0
+        self.dropped = 0
+
+    def record(self, tokens, first_latency, total_latency):
+        with self.lock:
+            self.samples.append((tokens, first_latency, total_latency))
+
+    def summary(self, bucket=250):
+        with self.lock:
+            samples = list(self.samples)
+            result = {"requests": len(samples), "summarized_turns": self.summarized,
+                      "dropped_turns": self.dropped}
+        if not samples:
+            return result
+        tokens = sorted(sample[0] for sample in samples)
+        result["prompt_tokens_avg"] = sum(tokens) / len(tokens)
+        result["prompt_tokens_p95"] = percentile(tokens, 0.95)
+        # Median time to first output per prompt-size bucket, e.g. {"0-249": 410.0, "250-499": 480.0}
+        buckets = {}
+        for size, first, _ in samples:
+            low = size // bucket * bucket
+            buckets.setdefault(low, []).append(first)
+        result["first_ms_by_tokens"] = {
+            f"{low}-{low + bucket - 1}": percentile(sorted(values), 0.5) * 1000
+            for low, values in sorted(buckets.items())
+        }
+        return result
+
+
+# ----------------- Conversation Memory -----------------
+class ConversationMemory:
+    """Rolling window of recent turns sent along with each question.
+
+    Turns are kept newest-first within `budget` estimated tokens. When the
+    window overflows, the oldest turn is folded into a short running summary
+    (its first question and answer sentences) instead of being re-sent in
+    full. Summary lines are dropped oldest first beyond `summary_budget`.
+    After `idle_seconds` without a question the conversation starts over.
+    """
+
+    def __init__(self, budget=1200, summary_budget=200, idle_seconds=600, system_prompt=None):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.idle_seconds = idle_seconds
+        self.system_prompt = system_prompt
+        self.stats = ConversationStats()
+        self._lock = threading.Lock()
+        self._turns = deque()    # (question, answer, tokens)
+        self._summary = deque()  # (line, tokens)
+        self._turn_tokens = 0
+        self._summary_tokens = 0
+        self._last_used = 0.0
+
+    def __len__(self):
+        with self._lock:
+            self._expire()
+            return len(self._turns) + len(self._summary)
+
+    def clear(self):
+        with self._lock:
+            self._turns.clear()
+            self._summary.clear()
+            self._turn_tokens = 0
+            self._summary_tokens = 0
+
+    def messages(self, prompt, with_history=True):
+        """Chat messages for prompt plus as much context as fits; returns (messages, tokens)
+
+        A question that stands on its own can leave the conversation out
+        (with_history=False); only the system prompt goes along then.
+        """
+        with self._lock:
+            self._expire()
+            system = self._system_text() if with_history else self.system_prompt
+            tokens = estimate_tokens(prompt) + (estimate_tokens(system) if system else 0)
+            turns = self._turns if with_history else ()
+
+            history = []
+            for question, answer, turn_tokens in reversed(turns):
+                if tokens + turn_tokens > self.budget:
+                    break
+                tokens += turn_tokens
+                history.append({"role": "assistant", "content": answer})
+                history.append({"role": "user", "content": question})
+
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.extend(reversed(history))
+        messages.append({"role": "user", "content": prompt})
+        return messages, tokens
+
+    def add(self, question, answer):
+        """Remember a finished turn, summarizing the oldest ones once over budget"""
+        with self._lock:
+            tokens = estimate_tokens(question) + estimate_tokens(answer)
+            self._turns.append((question, answer, tokens))
+            self._turn_tokens += tokens
+            self._last_used = time.monotonic()
+            while len(self._turns) > 1 and self._turn_tokens > self.budget:
+                self._fold_oldest()
+
+    def _fold_oldest(self):
+        question, answer, tokens = self._turns.popleft()
+        self._turn_tokens -= tokens
+        line = f'The user asked "{first_sentence(question)}" and you answered "{first_sentence(answer)}"'
+        line_tokens = estimate_tokens(line)
+        self._summary.append((line, line_tokens))
+        self._summary_tokens += line_tokens
+        self.stats.summarized += 1
+        while self._summary and self._summary_tokens > self.summary_budget:
+            _, dropped = self._summary.popleft()
+            self._summary_tokens -= dropped
+            self.stats.dropped += 1
+
+    def _system_text(self):
+        parts = [self.system_prompt] if self.system_prompt else []
+        if self._summary:
+            parts.append("Earlier in this conversation: " + " ".join(line + "." for line, _ in self._summary))
+        return " ".join(parts)
+
+    def _expire(self):
+        if self._last_used and time.monotonic() - self._last_used > self.idle_seconds:
+            self._turns.clear()
+            self._summary.clear()
+            self._turn_tokens = 0
+            self._summary_tokens = 0
+            self._last_used = 0.0
+
+
+if __name__ == "__main__":
+    memory = ConversationMemory(budget=120, summary_budget=60)
+    for i in range(6):
+        memory.add(f"Question number {i} about the solar system?",
+                   f"Answer {i}. Planets orbit the sun. Some have moons and rings.")
+        messages, tokens = memory.messages("And what about Pluto?")
+        print(f"turn {i}: {len(messages)} messages, ~{tokens} tokens")
+    for message in messages:
+        print(f"  {message['role']}: {message['content'][:90]}")
+    memory.stats.record(tokens, 0.4, 1.2)
+    print(memory.stats.summary())
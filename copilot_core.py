@@ -0,0 +1,1241 @@
+from startup import StartupTimeline, LazyModule
+import threading
+import os
+import re
+import time
+import subprocess
+import ctypes
+import random
+import sys
+from threading import Condition, Event, Lock
+from contextlib import contextmanager
+import queue
+from dotenv import load_dotenv
+from intents import IntentRegistry
+from answer_cache import AnswerCache, context_key, is_follow_up
+from conversation import ConversationMemory
+from speculative import Speculation
+from tts_worker import SpeechWorker
+from phrase_cache import PhraseCache, WavPlayer
+from command_executor import CommandExecutor
+from tracing import Tracer
+from cancellation import CancelScope
+from brightness import BrightnessService, SbcBackend
+from volume import VolumeService, create_mixer
+
+load_dotenv()
+
+# Run with --startup-timeline (or STARTUP_TIMELINE=1) to print when each startup phase ran
+timeline = StartupTimeline("--startup-timeline" in sys.argv or os.getenv("STARTUP_TIMELINE") == "1")
+timeline.mark("imports")
+
+# Per-stage latency spans for each turn; TRACE_FILE also appends them to a JSONL file
+tracer = Tracer(os.getenv("TRACE_FILE") or None)
+
+# Heavy backends are imported on first use, or in the background once the window is up
+sr = LazyModule("speech_recognition", timeline)
+pyttsx3 = LazyModule("pyttsx3", timeline)
+sbc = LazyModule("screen_brightness_control", timeline)
+groq_api = LazyModule("groq_client", timeline)
+mic_api = LazyModule("microphone", timeline)
+stt_api = LazyModule("stt", timeline)
+vad_api = LazyModule("vad", timeline)
+barge_api = LazyModule("barge_in", timeline)
+
+
+# ----------------- Frontend -----------------
+class Frontend:
+    """What the core shows to the user. Every method may be called from any thread.
+
+    This base class shows nothing, so the core runs headless as it is; the Tk
+    window in computer_copilot.py and the benchmark's recorder override it.
+    """
+
+    def show_status(self, text):
+        pass
+
+    def show_wave(self, active):
+        pass
+
+    def add_bubble(self, text, sender, posted_at=None):
+        pass
+
+    def append_to_bubble(self, holder, text):
+        """Start a bubble in an empty holder list, or extend the one it holds"""
+        pass
+
+    def switch_mode(self, voice):
+        set_mode(voice)
+
+    def turn_ended(self, turn=None):
+        """The last command and speech of `turn` have finished"""
+        pass
+
+    def stop_output(self):
+        """The turn was stopped: drop any reply still being revealed"""
+        pass
+
+    def quit(self):
+        pass
+
+
+frontend = Frontend()
+
+
+# ----------------- TTS Engine with Better Configuration -----------------
+SPEECH_RATE = 160  # words per minute
+
+
+def create_engine():
+    """Create and configure TTS engine"""
+    engine = pyttsx3.init('sapi5')
+    voices = engine.getProperty('voices')
+
+    # Better female voice selection
+    female_voice = None
+    for v in voices:
+        voice_name = v.name.lower()
+        if any(keyword in voice_name for keyword in ["zira", "hazel", "susan", "female", "woman", "cortana", "eva"]):
+            female_voice = v.id
+            print(f"Selected female voice: {v.name}")
+            break
+
+    if not female_voice:
+        for v in voices:
+            if "female" in v.name.lower():
+                female_voice = v.id
+                break
+        if not female_voice and len(voices) > 1:
+            female_voice = voices[1].id
+            print(f"Using fallback voice: {voices[1].name}")
+
+    if female_voice:
+        engine.setProperty('voice', female_voice)
+
+    engine.setProperty('rate', SPEECH_RATE)
+    engine.setProperty('volume', 0.9)
+
+    return engine
+
+
+# One worker thread owns the engine for the whole session; speak() just queues text.
+# Fixed phrases are rendered to WAV once per voice setting and played back from disk.
+phrase_cache = PhraseCache(os.getenv("PHRASE_CACHE_DIR", "phrase_cache"))
+speech = SpeechWorker(
+    create_engine,
+    on_start=lambda utterance: on_speech_start(utterance),
+    on_idle=lambda: on_speech_idle(),
+    on_enqueue=lambda utterance: on_speech_queued(),
+    phrase_cache=phrase_cache,
+    player=WavPlayer()
+)
+
+# ----------------- Global Variables with Better State Management -----------------
+voice_mode = True
+listening_active = False
+currently_speaking = False
+processing_command = False
+listening_thread = None
+turn_ended_at = None
+
+# Thread-safe state management. Every change to the flags above is made under
+# state_lock and followed by state_changed.notify_all(), so the listening loop
+# wakes the moment it can run the next turn instead of polling with sleeps.
+state_lock = Lock()
+state_changed = Condition(state_lock)
+command_queue = queue.Queue()
+
+# Each turn has its own cancellation scope (see begin_turn). A typed command can
+# begin its turn while the previous one is still running, so every turn that
+# hasn't ended stays in live_scopes (oldest first) and stopping cancels them all.
+turn_scope = CancelScope()  # the newest turn's
+live_scopes = []
+active_scope = None         # the turn whose output is playing now
+# The scope of the command a worker thread is running, so its speech and replies carry its turn
+running_command = threading.local()
+shutdown_event = Event()
+
+
+# ----------------- Status Update Functions -----------------
+def update_wave(active):
+    frontend.show_wave(active)
+
+
+def update_status(status_text, color="🟢"):
+    frontend.show_status(f"{color} {status_text}")
+
+
+# ----------------- State Notifications -----------------
+def notify_state():
+    """Wake every thread waiting on state_changed"""
+    with state_changed:
+        state_changed.notify_all()
+
+
+def begin_turn():
+    """Start a new turn in a fresh cancellation scope; returns (turn, scope).
+
+    Work left over from the previous turn keeps that turn's scope, so ending
+    that turn doesn't end the new one.
+    """
+    global turn_scope
+    scope = CancelScope(tracer.new_turn())
+    scope.on_cancel(lambda: frontend.stop_output())
+    with state_lock:
+        live_scopes.append(scope)
+        turn_scope = scope
+    return scope.turn, scope
+
+
+def start_turn_output(scope):
+    """Note that `scope`'s turn is the one producing output now"""
+    global active_scope
+    with state_lock:
+        active_scope = scope
+
+
+def mark_turn_ended(scope):
+    """Note that `scope`'s turn is over, and any older one; only the first call per turn counts"""
+    global turn_ended_at
+    with state_lock:
+        if scope not in live_scopes:
+            return
+        ended = live_scopes[:live_scopes.index(scope) + 1]
+        del live_scopes[:len(ended)]
+        turn_ended_at = time.perf_counter()
+    for ended_scope in ended:
+        tracer.end_turn(ended_scope.turn)
+        frontend.turn_ended(ended_scope.turn)
+
+
+def drop_turn(scope):
+    """End a turn whose command was dropped without running; older turns are left alone"""
+    with state_lock:
+        if scope not in live_scopes:
+            return
+        live_scopes.remove(scope)
+    tracer.end_turn(scope.turn)
+    frontend.turn_ended(scope.turn)
+
+
+@contextmanager
+def turn_output(scope):
+    """Tag the speech and bubbles this thread makes inside the block with `scope`'s turn"""
+    previous = getattr(running_command, "scope", None)
+    running_command.scope = scope
+    try:
+        yield
+    finally:
+        running_command.scope = previous
+
+
+def output_turn():
+    """The turn that output made on this thread belongs to, for frontends that route it"""
+    scope = getattr(running_command, "scope", None) or active_scope
+    return scope.turn if scope is not None else None
+
+
+def cancel_turns():
+    """Cancel every turn that hasn't ended: the running one and any still queued"""
+    with state_lock:
+        scopes = list(live_scopes)
+    for scope in scopes:
+        scope.cancel()
+
+
+# ----------------- Improved Stop Functions -----------------
+# Cancelling the turn's scope aborts its Groq request and typing animation at
+# once, and a worker that checks late still sees the stop.
+def stop_chat_only():
+    global processing_command
+    print("🛑 STOP CHAT PRESSED")
+
+    with state_lock:
+        processing_command = False
+        state_changed.notify_all()
+
+    cancel_turns()
+    command_executor.flush()
+
+    update_wave(False)
+    update_status("Chat Stopped", "🟡")
+
+    # Resume listening if in voice mode
+    if voice_mode:
+        resume_listening()
+
+
+def stop_chat_and_speaking():
+    global processing_command, currently_speaking
+    print("🛑 STOP ALL PRESSED")
+
+    with state_lock:
+        processing_command = False
+        currently_speaking = False
+        state_changed.notify_all()
+
+    cancel_turns()
+    command_executor.flush()
+
+    # Silence the current utterance and drop the queued ones; the engine stays alive
+    speech.stop()
+
+    update_wave(False)
+    update_status("All Stopped", "🔴")
+
+    # Resume listening if in voice mode
+    if voice_mode:
+        resume_listening()
+
+
+def resume_listening():
+    """Safely resume listening in voice mode"""
+    global listening_active
+    if voice_mode and not shutdown_event.is_set():
+        with state_lock:
+            listening_active = True
+            state_changed.notify_all()
+        update_status("Listening", "🟢")
+        print("✅ Listening resumed")
+
+
+# ----------------- Mode Switch -----------------
+def set_mode(voice):
+    """Switch between voice and chat mode, stopping whatever was in progress"""
+    global voice_mode, listening_active
+
+    # Switch first so the stop below doesn't resume listening in the old mode
+    with state_lock:
+        voice_mode = bool(voice)
+        listening_active = False
+        state_changed.notify_all()
+
+    # Stop everything, then start a fresh turn for the confirmation
+    stop_chat_and_speaking()
+    start_turn_output(begin_turn()[1])
+
+    if voice_mode:
+        update_status("Switching to Voice", "🔄")
+        # Queued speech holds the listening loop off until the confirmation is done
+        speak("Switched to voice mode. I'm ready to listen and respond to your commands.", cache=True)
+        resume_listening()
+    else:
+        update_status("Chat Mode", "💬")
+        frontend.add_bubble("Switched to chat mode. You can now type your messages.", "copilot")
+
+
+# ----------------- Improved Speak Function -----------------
+def clean_speech_text(text):
+    return text.replace("*", "").replace("_", "").strip()
+
+
+def on_speech_start(utterance):
+    if utterance.turn is not None:
+        tracer.end("first_audio", turn=utterance.turn)
+    if barge_in_monitor and voice_mode:
+        barge_in_monitor.arm()
+    update_wave(True)
+    update_status("Speaking", "🔊")
+
+
+def on_speech_queued():
+    """Called by the speech worker, under its lock, for every queued utterance"""
+    global currently_speaking
+    with state_lock:
+        currently_speaking = True
+
+
+def on_speech_idle():
+    """Called by the speech worker once its queue has drained"""
+    global currently_speaking
+    with state_lock:
+        # Something queued since the drain is being spoken already
+        if speech.busy:
+            return
+        currently_speaking = False
+        state_changed.notify_all()
+    if barge_in_monitor:
+        barge_in_monitor.disarm()
+    update_wave(False)
+
+    # A filler that drains while the answer is still coming doesn't end the turn
+    if not processing_command:
+        mark_turn_ended(active_scope)
+
+    # Resume listening in voice mode
+    if voice_mode and not processing_command and not shutdown_event.is_set():
+        resume_listening()
+    else:
+        update_status("Ready", "🟢")
+
+    print("🔇 Speech queue drained")
+
+
+def speak(text, cache=False):
+    """Show text in a bubble and queue it for speech; returns the queued Utterance.
+
+    Pass cache=True for fixed phrases so they play from the phrase cache.
+    """
+    print(f"🎯 speak() called: '{text[:50]}...' | voice_mode: {voice_mode}")
+
+    # Always add chat bubble
+    frontend.add_bubble(text, "copilot", time.perf_counter())
+
+    # Only speak in voice mode
+    if not voice_mode or shutdown_event.is_set():
+        return None
+
+    scope = getattr(running_command, "scope", None)
+    return speech.enqueue(clean_speech_text(text), cacheable=cache,
+                          turn=scope.turn if scope is not None else None)
+
+
+def speak_stream(sentences, scope):
+    """Show and queue each sentence as soon as the generator yields it.
+
+    Sentences go to the speech worker as they arrive, so the first one is
+    spoken while the rest of the answer is still being generated.
+    """
+    bubble_holder = []
+    for sentence in sentences:
+        if scope.is_set() or shutdown_event.is_set():
+            break
+
+        # Bubble grows with each sentence as it arrives
+        frontend.append_to_bubble(bubble_holder, sentence)
+
+        if voice_mode:
+            speech.enqueue(clean_speech_text(sentence), turn=scope.turn)
+
+
+# ----------------- Typed Commands -----------------
+def type_user_text(text):
+    frontend.add_bubble(text, "user", time.perf_counter())
+
+
+def submit_text(text):
+    """Queue a typed command for the listening loop; returns its turn's scope, or None"""
+    text = text.strip()
+    if not text or shutdown_event.is_set():
+        return None
+    turn, scope = begin_turn()
+    tracer.begin("first_audio", turn=turn)
+    type_user_text(text)
+    command_queue.put((text.lower(), scope))
+    notify_state()
+    return scope
+
+
+# ----------------- Speech Recognition -----------------
+# Keep the microphone open between commands (set MIC_CONTINUOUS=0 to reopen it every time)
+MIC_CONTINUOUS = os.getenv("MIC_CONTINUOUS", "1") != "0"
+# Speech-to-text engine: google (online), vosk or whisper (offline, local model)
+STT_BACKEND = os.getenv("STT_BACKEND", "google")
+# End a phrase when the voice activity detector hears speech stop (vad), or use
+# Recognizer.listen()'s fixed pause threshold and 7 s phrase limit (recognizer)
+ENDPOINTING = os.getenv("ENDPOINTING", "vad")
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "1"))
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "200"))
+# Keep listening while the answer is spoken and stop talking when the user speaks over it
+BARGE_IN = os.getenv("BARGE_IN") == "1"
+BARGE_IN_ONSET_MS = int(os.getenv("BARGE_IN_ONSET_MS", "80"))
+BARGE_IN_ECHO_RATIO = float(os.getenv("BARGE_IN_ECHO_RATIO", "2.0"))
+recognizer = None
+microphone = None
+stt = None
+stt_ready = Event()  # set once recognizer, STT backend (and microphone, if any) exist
+
+
+def load_speech_input():
+    """Import speech_recognition in the background and open the microphone"""
+    global recognizer, microphone, stt
+    try:
+        recognizer = sr.Recognizer()
+        with timeline.phase(f"stt backend {STT_BACKEND}"):
+            stt = stt_api.create_backend(STT_BACKEND, recognizer,
+                                         vosk_model=os.getenv("VOSK_MODEL_PATH"),
+                                         whisper_model=os.getenv("WHISPER_MODEL", "base.en"))
+        print(f"🗣️ Speech recognition: {stt.name}")
+        if ENDPOINTING == "vad":
+            vad_api.load()
+        if MIC_CONTINUOUS:
+            microphone = mic_api.ContinuousMicrophone(recognizer)
+    except Exception as e:
+        print(f"❌ Speech recognition unavailable: {e}")
+    finally:
+        stt_ready.set()
+    if microphone:
+        with timeline.phase("microphone"):
+            open_microphone()
+
+
+def install_speech_input(new_recognizer, new_stt, new_microphone=None):
+    """Use the given recognizer, STT backend and microphone instead of loading the real ones"""
+    global recognizer, microphone, stt
+    recognizer, stt, microphone = new_recognizer, new_stt, new_microphone
+    stt_ready.set()
+    if microphone:
+        open_microphone()
+
+
+def open_microphone():
+    """Open the shared input stream and calibrate for ambient noise once"""
+    global microphone
+    try:
+        microphone.start(calibration_seconds=0.5)
+        for stage, (started, finished) in microphone.timings.items():
+            tracer.record(stage, started, finished, turn=0)
+    except Exception as e:
+        print(f"⚠️ Continuous microphone unavailable, reopening per command: {e}")
+        microphone = None
+    if BARGE_IN:
+        start_barge_in()
+
+
+# ----------------- Barge-In -----------------
+# With BARGE_IN=1 the open microphone is also watched while the assistant speaks.
+# Speech well above the echo of its own voice stops the answer, and the next
+# capture starts from the ring buffer's pre-roll, so the first words aren't lost.
+barge_in_monitor = None
+barge_in_at = None
+
+
+def start_barge_in():
+    global barge_in_monitor
+    if not microphone:
+        print("⚠️ Barge-in needs the always-open microphone (MIC_CONTINUOUS=1)")
+        return
+    detector = barge_api.BargeInDetector(microphone.sample_rate, onset_ms=BARGE_IN_ONSET_MS,
+                                         echo_ratio=BARGE_IN_ECHO_RATIO)
+    barge_in_monitor = barge_api.BargeInMonitor(
+        microphone, detector, on_barge_in,
+        room_floor=lambda: recognizer.energy_threshold / recognizer.dynamic_energy_ratio).start()
+    print("🗣️ Barge-in enabled: speak over an answer to interrupt it")
+
+
+def on_barge_in(started):
+    """The user started talking at `started` while an answer was being spoken"""
+    global barge_in_at
+    if not voice_mode or shutdown_event.is_set():
+        return
+    print(f"🗣️ Barge-in after {(time.perf_counter() - started) * 1000:.0f} ms of your speech")
+    barge_in_at = started
+    # Ends the turn like Stop All; the listening loop picks the user up straight away
+    stop_chat_and_speaking()
+
+
+@contextmanager
+def microphone_source(timings):
+    """Audio source for one command: the always-open stream, or a fresh device.
+
+    Appends (stage, started, finished) for opening and calibrating to timings.
+    """
+    mic = microphone
+    if mic:
+        mic.ready.wait(5)
+    started = time.perf_counter()
+    if mic and mic.running:
+        with mic.listening() as source:
+            timings.append(("mic_open", started, time.perf_counter()))
+            yield source
+    else:
+        with sr.Microphone() as source:
+            opened = time.perf_counter()
+            timings.append(("mic_open", started, opened))
+            # Adjust for ambient noise
+            recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            timings.append(("calibration", opened, time.perf_counter()))
+            yield source
+
+
+def show_partial(text):
+    if text:
+        update_status(f"{text[-40:]}...", "👂")
+
+
+def take_command():
+    """Improved speech recognition with better error handling"""
+    global barge_in_at
+    if not voice_mode or not listening_active or currently_speaking or processing_command or shutdown_event.is_set():
+        return ""
+
+    if not stt_ready.wait(5) or stt is None:
+        shutdown_event.wait(1)
+        return ""
+
+    # Spans are only kept for phrases that turn into a command, under its turn id
+    timings = []
+    try:
+        with microphone_source(timings) as source:
+            update_wave(True)
+            update_status("Listening...", "👂")
+
+            # Streaming backends decode each chunk as listen() reads it
+            session = stt.start_stream(source.SAMPLE_RATE) if stt.streaming else None
+            if session:
+                source.stream = stt_api.TeeStream(source.stream, lambda chunk: show_partial(session.feed(chunk)))
+
+            # Listen for audio
+            capture_started = time.perf_counter()
+            if barge_in_at is not None:
+                # From the user's first word over the answer to capturing it as a command
+                timings.append(("barge_in", barge_in_at, capture_started))
+                barge_in_at = None
+            if ENDPOINTING == "vad":
+                # Seed the noise floor from the calibrated energy threshold
+                detector = vad_api.VoiceActivityDetector(
+                    source.SAMPLE_RATE, aggressiveness=VAD_AGGRESSIVENESS, hangover_ms=VAD_HANGOVER_MS,
+                    noise_floor=recognizer.energy_threshold / recognizer.dynamic_energy_ratio)
+                audio = vad_api.listen(source, detector, timeout=5)
+            else:
+                audio = recognizer.listen(source, timeout=5, phrase_time_limit=7)
+            captured = time.perf_counter()
+            timings.append(("capture", capture_started, captured))
+
+            update_wave(False)
+            update_status("Processing...", "🔄")
+
+            if shutdown_event.is_set():
+                return ""
+
+            # Recognize speech
+            started = time.perf_counter()
+            command = session.result() if session else stt.transcribe(audio)
+            timings.append(("recognition", started, time.perf_counter()))
+            print(f"✅ Recognized: '{command}' ({stt.name}, {(time.perf_counter() - started) * 1000:.0f} ms)")
+
+            turn, _ = begin_turn()
+            for stage, stage_started, stage_finished in timings:
+                tracer.record(stage, stage_started, stage_finished, turn=turn, backend=stt.name)
+            # From the end of the user's phrase to the first audio of the reply
+            tracer.begin("first_audio", turn=turn, started=captured)
+            type_user_text(command)
+            return command
+
+    except sr.WaitTimeoutError:
+        update_wave(False)
+        update_status("Listening", "🟢")
+        return ""
+    except sr.UnknownValueError:
+        # Listen again straight away; the next "Listening..." replaces this status
+        update_wave(False)
+        update_status("Didn't catch that", "🤔")
+        return ""
+    except Exception as e:
+        print(f"❌ Recognition error: {e}")
+        update_wave(False)
+        update_status("Error", "❌")
+        shutdown_event.wait(1)  # Back off so a broken device doesn't spin
+        update_status("Listening", "🟢")
+        return ""
+
+
+# ----------------- Groq API -----------------
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Stream answers sentence by sentence into TTS (set GROQ_STREAM=0 to disable)
+GROQ_STREAM = os.getenv("GROQ_STREAM", "1") != "0"
+# The "Let me think" filler only plays if no answer has started within this long
+FILLER_DELAY_MS = int(os.getenv("FILLER_DELAY_MS", "700"))
+
+# One pooled keep-alive session for every question, with bounded retries.
+# It's created in the background at startup; groq_ready is set once that's done.
+groq_client = None
+groq_ready = Event()
+
+# Repeated questions are answered from memory/disk instead of the network
+answer_cache = AnswerCache(os.getenv("ANSWER_CACHE_PATH", "answer_cache.db"))
+
+# Recent turns go along with each question so follow-ups keep their context
+conversation = ConversationMemory(budget=int(os.getenv("CONTEXT_TOKENS", "1200")),
+                                  idle_seconds=int(os.getenv("CONTEXT_IDLE_MINUTES", "10")) * 60)
+
+
+def load_groq_client(client=None):
+    """Import the HTTP stack and open the Groq connection off the UI thread.
+
+    A ready-made client (e.g. one pointed at fake_groq.py) is used as it is.
+    """
+    global groq_client
+    try:
+        if client is not None:
+            groq_client = client
+        elif GROQ_API_KEY:
+            groq_client = groq_api.GroqClient(GROQ_API_KEY)
+    except Exception as e:
+        print(f"❌ Groq client unavailable: {e}")
+    finally:
+        groq_ready.set()
+    # Connect now so the first question skips the TCP/TLS handshake
+    if groq_client:
+        with timeline.phase("groq warm-up"):
+            groq_client.warm_up()
+
+
+def get_groq_client():
+    """The shared client, waiting for the background load if it's still running"""
+    groq_ready.wait(10)
+    return groq_client
+
+
+def groq_error_message(error):
+    if error.status_code == 429:
+        return "Rate limit reached, please wait a moment."
+    return f"Error: {error.text}"
+
+
+def question_messages(prompt):
+    """Chat messages for a question and the answer cache's key for their context.
+
+    A question that doesn't point back at earlier turns is asked without the
+    conversation, so its answer is cached for the prompt alone and repeats hit.
+    """
+    messages, tokens = conversation.messages(prompt, with_history=is_follow_up(prompt))
+    return messages, tokens, context_key(messages)
+
+
+def ask_groq(prompt, scope):
+    if shutdown_event.is_set():
+        return "Request cancelled."
+
+    client = get_groq_client()
+    if not client:
+        return "Groq API key not set."
+
+    messages, tokens, context = question_messages(prompt)
+    try:
+        started = time.perf_counter()
+        answer = client.complete(messages, cancel=scope)
+        if scope.is_set():
+            return ""  # a stopped answer is neither remembered nor cached
+        latency = tracer.record("llm", started, turn=scope.turn, tokens=tokens)
+        conversation.stats.record(tokens, latency, latency)
+        conversation.add(prompt, answer)
+        answer_cache.put(prompt, answer, context)
+        return answer
+    except groq_api.GroqError as e:
+        return "" if scope.is_set() else groq_error_message(e)
+    except Exception as e:
+        return "" if scope.is_set() else f"Failed to contact Groq API: {e}"
+
+
+def ask_groq_answer(prompt, scope):
+    """The whole answer as a one-item generator, for GROQ_STREAM=0.
+
+    Cancelling `scope` closes the connection, even before the answer arrives.
+    """
+    answer = ask_groq(prompt, scope)
+    if answer:
+        yield answer
+
+
+def ask_groq_stream(prompt, scope):
+    """Like ask_groq(), but yields the answer one sentence at a time.
+
+    Cancelling `scope` closes the connection mid-stream.
+    """
+    if shutdown_event.is_set():
+        yield "Request cancelled."
+        return
+
+    client = get_groq_client()
+    if not client:
+        yield "Groq API key not set."
+        return
+
+    messages, tokens, context = question_messages(prompt)
+    try:
+        started = time.perf_counter()
+        first = None
+        sentences = []
+        for sentence in client.stream_sentences(messages, cancel=scope):
+            if first is None:
+                first = tracer.record("llm_first", started, turn=scope.turn, tokens=tokens)
+            sentences.append(sentence)
+            yield sentence
+        if not scope.is_set() and sentences:
+            answer = " ".join(sentences)
+            conversation.stats.record(tokens, first, tracer.record("llm", started, turn=scope.turn, tokens=tokens))
+            conversation.add(prompt, answer)
+            answer_cache.put(prompt, answer, context)
+    except groq_api.GroqError as e:
+        if not scope.is_set():
+            yield groq_error_message(e)
+    except Exception as e:
+        if not scope.is_set():
+            yield f"Failed to contact Groq API: {e}"
+
+
+# ----------------- Local Intents -----------------
+# Each local command is registered once with its trigger phrases and a priority.
+# The registry compiles them into a word-level trie, so "hi" no longer fires
+# inside "this" and overlapping phrases are resolved by priority, not by order.
+command_intents = IntentRegistry()
+
+
+@command_intents.intent("voice_mode", ["switch to voice mode", "enable voice mode"], priority=100)
+def intent_voice_mode(command):
+    if not voice_mode:
+        frontend.switch_mode(True)
+    else:
+        speak("I'm already in voice mode and ready to talk!", cache=True)
+
+
+@command_intents.intent("chat_mode", ["switch to chat mode", "enable chat mode", "typing mode"], priority=100)
+def intent_chat_mode(command):
+    if voice_mode:
+        frontend.switch_mode(False)
+    else:
+        speak("Already in chat mode.", cache=True)
+
+
+# Greetings rank below everything else so "hey, open notepad" still opens Notepad
+@command_intents.intent("greeting", ["hello", "hi", "hey"], priority=5)
+def intent_greeting(command):
+    speak("Hello Udhav! I'm your sweet assistant Siri. How can I help you today?", cache=True)
+
+
+@command_intents.intent("how_are_you", ["how are you"], priority=6)
+def intent_how_are_you(command):
+    speak("I'm doing great, thank you for asking! I'm here and ready to help you", cache=True)
+
+
+@command_intents.intent("notepad", ["notepad"], priority=50)
+def intent_notepad(command):
+    speak("Opening Notepad for you.", cache=True)
+    os.system("notepad")
+
+
+@command_intents.intent("calculator", ["calculator"], priority=50)
+def intent_calculator(command):
+    speak("Opening Calculator.", cache=True)
+    subprocess.Popen("calc.exe")
+
+
+@command_intents.intent("play_music", ["play music"], priority=50)
+def intent_play_music(command):
+    music_path = "music\\sample.mp3"
+    if os.path.exists(music_path):
+        speak("Playing your music now.", cache=True)
+        os.startfile(music_path)
+    else:
+        speak("I couldn't find the music file. Please check if it exists.", cache=True)
+
+
+@command_intents.intent("play_video", ["play video"], priority=50)
+def intent_play_video(command):
+    video_path = "videos\\sample_video.mp4"
+    if os.path.exists(video_path):
+        speak("Starting your video.", cache=True)
+        os.startfile(video_path)
+    else:
+        speak("Video file not found. Please check the file path.", cache=True)
+
+
+# The mixer is written in the background; a burst of commands becomes one write
+VOLUME_STEP = int(os.getenv("VOLUME_STEP", "10"))
+volume = VolumeService(
+    create_mixer(os.getenv("VOLUME_BACKEND", "auto")),
+    coalesce_ms=int(os.getenv("VOLUME_COALESCE_MS", "50")),
+    on_error=lambda error: speak("Sorry, I couldn't change the volume.", cache=True)
+)
+
+
+@command_intents.intent("volume_up", ["increase volume", "increase the volume", "raise the volume", "volume up"],
+                        priority=50)
+def intent_volume_up(command):
+    volume.step(VOLUME_STEP)
+    speak("Increasing the volume for you.", cache=True)
+
+
+@command_intents.intent("volume_down", ["decrease volume", "decrease the volume", "lower the volume", "volume down"],
+                        priority=50)
+def intent_volume_down(command):
+    volume.step(-VOLUME_STEP)
+    speak("Decreasing the volume.", cache=True)
+
+
+# Outranks "increase volume" in "increase volume to 80", but only with a number:
+# "increase volume to the max" is still a step up
+@command_intents.intent("set_volume", ["set volume {n}", "set volume to {n}", "volume to {n}"], priority=52)
+def intent_set_volume(command):
+    level = int(re.search(r"\d+", command).group())
+    speak(f"Setting the volume to {volume.set(level)} percent.")
+
+
+@command_intents.intent("mute", ["mute"], priority=50)
+def intent_mute(command):
+    volume.mute(True)
+    speak("Muting the volume.", cache=True)
+
+
+@command_intents.intent("unmute", ["unmute"], priority=50)
+def intent_unmute(command):
+    volume.mute(False)
+    speak("Unmuting the volume.", cache=True)
+
+
+@command_intents.intent("lock", ["lock system", "lock pc"], priority=50)
+def intent_lock(command):
+    speak("Locking your system now.", cache=True)
+    ctypes.windll.user32.LockWorkStation()
+
+
+@command_intents.intent("shutdown", ["shutdown"], priority=50)
+def intent_shutdown(command):
+    speak("Shutting down the system. Goodbye!", cache=True)
+    os.system("shutdown /s /t 1")
+
+
+# "restart" outranks "shutdown": a restart is the less destructive reading
+@command_intents.intent("restart", ["restart"], priority=51)
+def intent_restart(command):
+    speak("Restarting the system.", cache=True)
+    os.system("shutdown /r /t 1")
+
+
+@command_intents.intent("open_downloads", ["open downloads"], priority=50)
+def intent_open_downloads(command):
+    speak("Opening your downloads folder.", cache=True)
+    downloads_path = os.path.join(os.path.expanduser("~"), "Downloads")
+    os.startfile(downloads_path)
+
+
+@command_intents.intent("open_google", ["open google"], priority=50)
+def intent_open_google(command):
+    speak("Opening Google for you.", cache=True)
+    os.system("start https://www.google.com")
+
+
+@command_intents.intent("open_youtube", ["open youtube"], priority=50)
+def intent_open_youtube(command):
+    speak("Opening YouTube.", cache=True)
+    os.system("start https://www.youtube.com")
+
+
+# The display is changed in the background; repeated commands just move the target
+BRIGHTNESS_STEP = int(os.getenv("BRIGHTNESS_STEP", "20"))
+brightness = BrightnessService(
+    SbcBackend(sbc),
+    ramp_ms=int(os.getenv("BRIGHTNESS_RAMP_MS", "300")),
+    on_error=lambda error: speak("Sorry, I couldn't change the brightness.", cache=True)
+)
+
+
+@command_intents.intent("brightness_up", ["increase brightness"], priority=50)
+def intent_brightness_up(command):
+    brightness.adjust(BRIGHTNESS_STEP)
+    speak("Brightness increased.", cache=True)
+
+
+@command_intents.intent("brightness_down", ["decrease brightness"], priority=50)
+def intent_brightness_down(command):
+    brightness.adjust(-BRIGHTNESS_STEP)
+    speak("Brightness decreased.", cache=True)
+
+
+@command_intents.intent("change_wallpaper", ["change wallpaper"], priority=50)
+def intent_change_wallpaper(command):
+    wallpaper_folder = "wallpapers"
+    try:
+        wallpapers = [os.path.join(wallpaper_folder, f) for f in os.listdir(wallpaper_folder)
+                      if f.endswith((".jpg", ".png"))]
+        if wallpapers:
+            chosen = random.choice(wallpapers)
+            ctypes.windll.user32.SystemParametersInfoW(20, 0, os.path.abspath(chosen), 3)
+            speak("I've changed your wallpaper!", cache=True)
+        else:
+            speak("I couldn't find any wallpaper images.", cache=True)
+    except:
+        speak("Sorry, I couldn't change the wallpaper.", cache=True)
+
+
+@command_intents.intent("exit", ["exit", "quit", "goodbye"], priority=10)
+def intent_exit(command):
+    goodbye = speak("Goodbye Udhav! It was nice talking with you. Have a great day!", cache=True)
+    if goodbye:
+        goodbye.done.wait(timeout=5)  # Let the goodbye message finish
+    shutdown_event.set()
+    notify_state()
+    frontend.quit()
+
+
+@command_intents.intent("new_conversation", ["new conversation", "start over", "forget our conversation"],
+                        priority=50)
+def intent_new_conversation(command):
+    conversation.clear()
+    speak("Okay, let's start a fresh conversation.", cache=True)
+
+
+# ----------------- Improved Command Handler -----------------
+def handle_command(command, scope):
+    global listening_active, processing_command
+
+    if not command or shutdown_event.is_set():
+        return
+
+    start_turn_output(scope)
+    running_command.scope = scope
+    with state_lock:
+        processing_command = True
+        listening_active = False
+
+    update_status("Processing", "⚡")
+    print(f"🎯 Processing command: '{command}'")
+
+    try:
+        intent = command_intents.match(command)
+        tracer.end("dispatch", turn=scope.turn, intent=intent.name if intent else "llm")
+        if intent:
+            intent.handler(command)
+
+        # Fallback to Groq API, unless we've answered this one before
+        elif not shutdown_event.is_set():
+            # Follow-ups only hit answers given in the same conversation
+            cached = answer_cache.get(command, question_messages(command)[2])
+            if cached:
+                print("⚡ Answer served from cache")
+                conversation.add(command, cached)
+                speak(cached)
+                return
+
+            if scope.is_set():
+                return  # stopped before we got this far
+
+            # Ask straight away; the filler only covers a slow start and the
+            # answer queues behind it rather than cutting it off
+            answer = Speculation(ask_groq_stream if GROQ_STREAM else ask_groq_answer, command, scope)
+            # A stop ends the wait below and the iteration in speak_stream() at once
+            scope.on_cancel(answer.cancel)
+            if not answer.wait_first(FILLER_DELAY_MS / 1000.0):
+                speak("Let me think about that for you.", cache=True)
+            else:
+                print(f"⚡ Answer started in {answer.first_at * 1000:.0f} ms, no filler needed"
+                      if answer.first_at is not None else "⚡ Answer finished before the filler")
+            if not scope.is_set() and not shutdown_event.is_set():
+                speak_stream(answer, scope)
+
+    except Exception as e:
+        print(f"❌ Error in handle_command: {e}")
+        if not shutdown_event.is_set():
+            speak("Sorry, I encountered an error while processing your request.", cache=True)
+    finally:
+        running_command.scope = None
+
+
+# ----------------- Command Executor -----------------
+# A small fixed pool runs commands from a bounded queue instead of one thread per
+# command. Commands from the same source run in order; when the queue is full,
+# repeats of a pending command are merged and otherwise the oldest is dropped.
+command_executor = CommandExecutor(
+    lambda command, scope: handle_command(command, scope),
+    workers=int(os.getenv("COMMAND_WORKERS", "1")),
+    max_queue=int(os.getenv("COMMAND_QUEUE_DEPTH", "8")),
+    policy=os.getenv("COMMAND_OVERFLOW", "coalesce"),
+    on_idle=lambda: on_commands_idle(),
+    on_drop=lambda command, scope, reason: on_command_dropped(command, scope, reason)
+)
+
+
+def on_command_dropped(command, scope, reason):
+    """Called by the executor for a command that will never run; ends its turn"""
+    if reason == "coalesced":
+        print(f"🔁 Merged '{command}' into the same command queued after it")
+    elif reason in ("dropped", "rejected"):
+        print(f"⚠️ Busy, dropped command: '{command}'")
+        update_status("Busy - command dropped", "⏳")
+        with turn_output(scope):
+            frontend.add_bubble(f"Skipped \"{command}\": too many commands were waiting.", "copilot")
+    drop_turn(scope)
+    # A rejected command may have been the only one; nothing else would clear the busy flag
+    if not command_executor.busy:
+        on_commands_idle()
+
+
+def on_commands_idle():
+    """Called by the executor once no command is running or pending"""
+    global processing_command
+    with state_lock:
+        processing_command = False
+        state_changed.notify_all()
+
+    # Queuing speech marks us as speaking before speak() returns, so if nothing is queued
+    # the turn is over now; otherwise the speech worker resumes when it drains
+    if not currently_speaking:
+        mark_turn_ended(active_scope)
+        if voice_mode and not shutdown_event.is_set():
+            resume_listening()
+
+
+# ----------------- Robust Listening Loop -----------------
+def ready_for_next_turn():
+    """Wake-up condition for the listening loop; call with state_lock held"""
+    return (shutdown_event.is_set() or not command_queue.empty()
+            or (voice_mode and not processing_command and not currently_speaking))
+
+
+def dispatch_command(command, source, scope):
+    """Queue a command on the executor with its turn's scope, marking us busy first"""
+    global listening_active, processing_command
+    with state_lock:
+        processing_command = True
+        listening_active = False
+        state_changed.notify_all()
+
+    tracer.begin("dispatch", turn=scope.turn)
+    command_executor.submit(command, key=source, context=scope)
+
+
+def listening_loop():
+    """Main listening loop with improved error handling and recovery"""
+    global listening_active, turn_ended_at
+    print("🎧 Listening loop started")
+
+    consecutive_errors = 0
+    max_consecutive_errors = 5
+
+    while not shutdown_event.is_set():
+        try:
+            # Sleep until there is a command to run or we're free to listen
+            with state_changed:
+                state_changed.wait_for(ready_for_next_turn)
+
+            if shutdown_event.is_set():
+                break
+
+            # Process any queued commands from chat mode
+            if not command_queue.empty():
+                command, scope = command_queue.get_nowait()
+                dispatch_command(command, "chat", scope)
+                continue
+
+            # Voice mode listening logic
+            if voice_mode and not processing_command and not currently_speaking:
+                # Auto-enable listening if it's disabled (failsafe)
+                if not listening_active:
+                    print("🔄 Auto-enabling listening (failsafe)")
+                    with state_lock:
+                        listening_active = True
+                    update_status("Auto-resumed", "🔄")
+
+                # From the end of the last turn to listening again; benchmark.py reports it
+                if turn_ended_at is not None:
+                    tracer.record("turn_around", turn_ended_at)
+                    turn_ended_at = None
+
+                # Try to get voice command
+                command = take_command()
+                if command and not shutdown_event.is_set():
+                    # Process command in separate thread
+                    dispatch_command(command, "voice", turn_scope)
+                    consecutive_errors = 0  # Reset error counter on success
+
+            # Reset error counter if we get here without exception
+            consecutive_errors = 0
+
+        except Exception as e:
+            print(f"❌ Listening loop error: {e}")
+            consecutive_errors += 1
+
+            # If too many consecutive errors, take a longer break
+            if consecutive_errors >= max_consecutive_errors:
+                print(f"⚠️ Too many consecutive errors ({consecutive_errors}), taking longer break")
+                update_status("Error Recovery", "🔧")
+                shutdown_event.wait(5)
+                consecutive_errors = 0
+
+                # Try to recover by resetting listening state
+                if voice_mode and not shutdown_event.is_set():
+                    with state_lock:
+                        listening_active = True
+                    update_status("Recovered", "✅")
+            else:
+                shutdown_event.wait(1)
+
+    print("🛑 Listening loop ended")
+
+
+# ----------------- Startup Function -----------------
+def start_backends(engine_factory=None, speech_input=None, groq=None, display=None, mixer=None):
+    """Bring up speech, recognition and Groq in the background.
+
+    Stand-ins replace the real devices, e.g. for the headless benchmark:
+    engine_factory builds the TTS engine, speech_input is a (recognizer,
+    STT backend, microphone) tuple, groq is a ready-made client, display a
+    brightness backend and mixer a volume backend.
+    """
+    if engine_factory is not None:
+        speech.engine_factory = engine_factory
+    speech.start()
+    timeline.watch("tts engine", speech.ready)
+    if speech_input is not None:
+        install_speech_input(*speech_input)
+    else:
+        threading.Thread(target=load_speech_input, name="load-speech-input", daemon=True).start()
+    threading.Thread(target=load_groq_client, args=(groq,), name="load-groq", daemon=True).start()
+    if display is not None:
+        brightness.backend = display
+    if mixer is not None:
+        volume.backend = mixer
+    # Both read the current level now, so their commands start from the cache
+    brightness.start()
+    volume.start()
+    timeline.report_when([speech.ready, stt_ready, groq_ready])
+
+
+def start_after_welcome(welcome=True):
+    global listening_active, listening_thread
+    print("🚀 Starting Computer Copilot...")
+
+    shutdown_event.clear()
+
+    # Enable listening
+    with state_lock:
+        listening_active = True
+        state_changed.notify_all()
+
+    update_status("Starting...", "🚀")
+
+    # Welcome message
+    if welcome:
+        speak(
+            "Hi Udhav! I'm your personal assistant.I'm ready to help you with anything you need", cache=True)
+
+    # Start the main listening loop
+    listening_thread = threading.Thread(target=listening_loop, daemon=True)
+    listening_thread.start()
+
+
+# ----------------- Shutdown -----------------
+def shutdown():
+    """Stop every worker and device and print the session stats"""
+    shutdown_event.set()
+    notify_state()
+
+    speech.shutdown()
+
+    print(f"📊 Commands: {command_executor.summary()}")
+    command_executor.shutdown()
+
+    print(f"📊 Brightness: {brightness.stats()}")
+    brightness.stop()
+    print(f"📊 Volume: {volume.stats()}")
+    volume.stop()
+
+    if barge_in_monitor:
+        print(f"📊 Barge-in: {barge_in_monitor.stats()}")
+        barge_in_monitor.stop()
+    if microphone:
+        microphone.stop()
+
+    if groq_client:
+        print(f"📊 Groq stats: {groq_client.stats.summary()}")
+        groq_client.close()
+
+    print(f"📊 Answer cache: {answer_cache.stats()}")
+    print(f"📊 Conversation: {conversation.stats.summary()}")
+    for stage, stats in tracer.percentiles().items():
+        print(f"📊 {stage}: n={stats['count']} p50 {stats['p50_ms']:.0f} ms, "
+              f"p95 {stats['p95_ms']:.0f} ms, p99 {stats['p99_ms']:.0f} ms")
+    tracer.close()
+    print(f"📊 Phrase cache: {phrase_cache.stats()}")
+    answer_cache.close()
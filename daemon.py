@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import copilot_core as core
+
+MAX_BODY = 64 * 1024
+
+
+# ----------------- Daemon Frontend -----------------
+class DaemonFrontend(core.Frontend):
+    """Forwards the core's replies and turn ends, tagged with their turn, to the daemon's event loop"""
+
+    def __init__(self, daemon):
+        self.daemon = daemon
+
+    def add_bubble(self, text, sender, posted_at=None):
+        if sender == "copilot":
+            self.daemon.post({"event": "reply", "text": text, "spoken": core.voice_mode, "turn": core.output_turn()})
+
+    def append_to_bubble(self, holder, text):
+        self.daemon.post({"event": "reply", "text": text, "spoken": core.voice_mode, "turn": core.output_turn()})
+
+    def turn_ended(self, turn=None):
+        self.daemon.post({"event": "turn_ended", "turn": turn})
+
+    def quit(self):
+        self.daemon.post({"event": "quit"})
+
+
+# ----------------- Command API -----------------
+class CommandDaemon:
+    """Local command API served from a single asyncio event loop.
+
+    Any number of clients can connect at once; each connection is a coroutine,
+    not a thread. Commands from every request go into one job queue and a
+    single runner hands them to the core one turn at a time through
+    submit_text(), the same path a typed command takes, then streams that
+    turn's replies back to the client that sent it as JSON lines. Replies are
+    matched to the job by turn, so a spoken command's answer, or one arriving
+    after its job timed out, never reaches another client.
+
+        POST /commands  {"commands": ["hello", "what is a quasar"]}  (or one command per line)
+        POST /stop      stop the running command and any speech
+        GET  /status
+    """
+
+    def __init__(self, max_pending=100, turn_timeout=60):
+        self.max_pending = max_pending
+        self.turn_timeout = turn_timeout
+        self.pending = 0
+        self.served = 0
+        self.loop = None
+        self._jobs = None
+        self._current = None  # replies of the running job's turn go here
+        self._turn = None
+        self._stopped = None
+        self._clients = set()
+
+    # ---- called from core threads ----
+    def post(self, event):
+        """Hand a core event to the loop"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event):
+        if event["event"] == "quit":
+            if self._current is not None:
+                self._current.put_nowait(event)
+            else:
+                self._stopped.set()
+        elif self._current is not None and event["turn"] == self._turn:
+            self._current.put_nowait(event)
+
+    # ---- job runner ----
+    async def _run_jobs(self):
+        while True:
+            command, replies = await self._jobs.get()
+            started = time.perf_counter()
+            self._current = asyncio.Queue()
+            outcome = "rejected"
+            scope = core.submit_text(command)
+            if scope is not None:
+                self._turn = scope.turn
+                # Stopping the turn from anywhere (/stop, a voice command) ends its task at once
+                forward = scope.link_task(asyncio.ensure_future(self._forward_turn(command, replies)))
+                await asyncio.wait([forward])
+                outcome = "stopped" if forward.cancelled() else forward.result()
+            self._current = None
+            self._turn = None
+            self.pending -= 1
+            self.served += 1
+            replies.put_nowait({"command": command, "event": outcome,
+                                "ms": round((time.perf_counter() - started) * 1000, 1)})
+            if outcome == "quit":
+                self._stopped.set()
+
+    async def _forward_turn(self, command, replies):
+        deadline = self.loop.time() + self.turn_timeout
+        while True:
+            try:
+                event = await asyncio.wait_for(self._current.get(), max(0, deadline - self.loop.time()))
+            except asyncio.TimeoutError:
+                return "timeout"
+            if event["event"] == "turn_ended":
+                return "done"
+            if event["event"] == "quit":
+                return "quit"
+            replies.put_nowait(dict(event, command=command))
+
+    # ---- HTTP ----
+    async def _handle(self, reader, writer):
+        client = asyncio.current_task()
+        self._clients.add(client)
+        try:
+            method, path, body = await read_request(reader)
+            if method == "POST" and path == "/commands":
+                await self._commands(writer, parse_commands(body))
+            elif method == "POST" and path == "/stop":
+                await self.loop.run_in_executor(None, core.stop_chat_and_speaking)
+                await respond_json(writer, 200, {"stopped": True})
+            elif method == "GET" and path == "/status":
+                await respond_json(writer, 200, self.status())
+            else:
+                await respond_json(writer, 404, {"error": f"no route for {method} {path}"})
+        except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            await respond_json(writer, 400, {"error": "bad request"})
+        except ConnectionError:
+            pass  # the client went away; its remaining replies are dropped
+        finally:
+            writer.close()
+            self._clients.discard(client)
+
+    async def _commands(self, writer, commands):
+        if not commands:
+            await respond_json(writer, 400, {"error": "no commands"})
+            return
+        if self.pending + len(commands) > self.max_pending:
+            await respond_json(writer, 503, {"error": "busy", "pending": self.pending})
+            return
+
+        replies = asyncio.Queue()
+        for command in commands:
+            self._jobs.put_nowait((command, replies))
+        self.pending += len(commands)
+
+        writer.write(response_head(200, "application/x-ndjson"))
+        finished = 0
+        while finished < len(commands):
+            event = await replies.get()
+            if event["event"] not in ("reply",):
+                finished += 1
+            writer.write(json.dumps(event).encode("utf-8") + b"\n")
+            await writer.drain()
+
+    def status(self):
+        return {"voice_mode": core.voice_mode, "processing": core.processing_command,
+                "speaking": core.currently_speaking, "pending": self.pending, "served": self.served,
+                "turn": core.tracer.turn}
+
+    async def serve(self, host="127.0.0.1", port=8765, socket_path=None):
+        """Serve until an exit command (or Ctrl+C)"""
+        self.loop = asyncio.get_running_loop()
+        self._jobs = asyncio.Queue()
+        self._stopped = asyncio.Event()
+        runner = asyncio.ensure_future(self._run_jobs())
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)  # left over from a daemon that didn't exit cleanly
+            server = await asyncio.start_unix_server(self._handle, socket_path)
+            print(f"🛰️ Command API on unix:{socket_path}")
+        else:
+            server = await asyncio.start_server(self._handle, host, port)
+            print(f"🛰️ Command API on http://{host}:{server.sockets[0].getsockname()[1]}")
+
+        try:
+            await self._stopped.wait()
+        finally:
+            server.close()
+            # Let responses that are still streaming (e.g. to the "exit" itself) finish
+            if self._clients:
+                await asyncio.wait(list(self._clients), timeout=1)
+            await server.wait_closed()
+            runner.cancel()
+
+
+# ----------------- Minimal HTTP/1.1 -----------------
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 503: "Service Unavailable"}
+
+
+async def read_request(reader):
+    """(method, path, body) of one request; raises ValueError if it's malformed"""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, target, _ = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length < 0 or length > MAX_BODY:
+        raise ValueError("body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target.split("?", 1)[0], body
+
+
+def parse_commands(body):
+    """Commands from a JSON body ({"commands": [...]} or {"command": "..."}) or plain text lines"""
+    text = body.decode("utf-8", "replace")
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return [line.strip() for line in text.splitlines() if line.strip()]
+    if isinstance(payload, dict):
+        payload = payload.get("commands", [payload.get("command", "")])
+    if isinstance(payload, str):
+        payload = [payload]
+    return [str(command).strip() for command in payload if str(command).strip()]
+
+
+def response_head(status, content_type):
+    # Every response ends by closing the connection, so streamed bodies need no framing
+    return (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nConnection: close\r\n\r\n").encode("latin-1")
+
+
+async def respond_json(writer, status, payload):
+    writer.write(response_head(status, "application/json") + json.dumps(payload).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+# ----------------- Entry Point -----------------
+def start_core(daemon, voice=False, fake=False):
+    """Bring the core up headless, with the real devices or the benchmark's stand-ins"""
+    core.frontend = DaemonFrontend(daemon)
+    if fake:
+        from groq_client import GroqClient
+        from fake_groq import FakeGroqServer
+        from fake_devices import NullEngine, FakeDisplay, FakeMixer
+        server = FakeGroqServer(reply="This is the fake server. It answers every question the same way.").start()
+        core.speech.player = None
+        core.start_backends(engine_factory=NullEngine, speech_input=(None, None),
+                            groq=GroqClient("fake-key", url=server.url), display=FakeDisplay(), mixer=FakeMixer())
+    elif voice:
+        core.start_backends()
+    else:
+        # Commands only arrive over the API, so the microphone stays closed
+        core.start_backends(speech_input=(None, None))
+    if not voice or fake:
+        core.set_mode(False)
+    core.start_after_welcome(welcome=False)
+
+
+if __name__ == "__main__":
+    # python daemon.py [--port 8765 | --socket /tmp/copilot.sock] [--voice] [--fake]
+    #   curl -N localhost:8765/commands -d '{"commands": ["hello", "what is a black hole"]}'
+    #   curl --unix-socket /tmp/copilot.sock localhost/status
+    parser = argparse.ArgumentParser(description="Run Computer Copilot without a window, driven over a local API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("DAEMON_PORT", "8765")))
+    parser.add_argument("--socket", default=os.getenv("DAEMON_SOCKET"), help="serve on this Unix socket instead")
+    parser.add_argument("--voice", action="store_true", help="also listen on the microphone and speak replies")
+    parser.add_argument("--fake", action="store_true",
+                        help="use the null TTS, a fake display and mixer and fake_groq.py instead of real devices")
+    args = parser.parse_args()
+
+    if args.socket and not hasattr(asyncio, "start_unix_server"):
+        sys.exit("Unix sockets aren't available on this platform; use --port")
+
+    daemon = CommandDaemon(max_pending=int(os.getenv("DAEMON_MAX_PENDING", "100")))
+    start_core(daemon, voice=args.voice, fake=args.fake)
+    try:
+        asyncio.run(daemon.serve(args.host, args.port, args.socket))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        core.shutdown()
@@ -0,0 +1,257 @@
+import os
+import time
+import wave
+import threading
+from contextlib import contextmanager
+
+import speech_recognition as sr
+
+
+# ----------------- WAV Replay Microphone -----------------
+class ReplayStream:
+    """Reads one WAV phrase chunk by chunk, then silence until the session ends"""
+
+    def __init__(self, mic, pcm):
+        self.mic = mic
+        self.pcm = pcm
+        self.offset = 0
+
+    def read(self, size=None):
+        if not self.mic.running:
+            return b""
+        size = size or self.mic.chunk_size
+        length = size * self.mic.sample_width
+        chunk = self.pcm[self.offset:self.offset + length]
+        self.offset += length
+        if len(chunk) < length:
+            chunk += b"\x00" * (length - len(chunk))
+        if self.mic.speed:
+            # Block like a real device would while the chunk is being captured
+            self.mic.stopped.wait(size / float(self.mic.sample_rate) / self.mic.speed)
+        return chunk
+
+
+class ReplaySource(sr.AudioSource):
+    def __init__(self, mic, pcm):
+        self.SAMPLE_RATE = mic.sample_rate
+        self.SAMPLE_WIDTH = mic.sample_width
+        self.CHUNK = mic.chunk_size
+        self.stream = ReplayStream(mic, pcm)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class WavReplayMicrophone:
+    """Stand-in for ContinuousMicrophone that plays WAV files instead of a device.
+
+    Every listening() session starts the next file (round robin) from its
+    beginning. `speed` 1.0 delivers audio in real time; 0 delivers it as fast
+    as it is read. Files must be 16-bit mono PCM at one sample rate.
+    """
+
+    def __init__(self, paths, chunk_size=1024, speed=0.0):
+        self.chunk_size = chunk_size
+        self.speed = speed
+        self.sample_width = 2
+        self.sample_rate = None
+        self.phrases = []
+        for path in paths:
+            with wave.open(path, "rb") as wav:
+                if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+                    raise ValueError(f"{path}: only 16-bit mono PCM is supported")
+                if self.sample_rate not in (None, wav.getframerate()):
+                    raise ValueError(f"{path}: every file must have the same sample rate")
+                self.sample_rate = wav.getframerate()
+                self.phrases.append(wav.readframes(wav.getnframes()))
+        self.sessions = 0
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.timings = {}
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self, calibration_seconds=0.0):
+        started = time.perf_counter()
+        self._running = True
+        self.stopped.clear()
+        self.timings = {"mic_open": (started, time.perf_counter())}
+        self.ready.set()
+        return self
+
+    def stop(self):
+        self._running = False
+        self.stopped.set()
+
+    @contextmanager
+    def listening(self, preroll=True):
+        # A replayed phrase always starts at its beginning, so there's no pre-roll to skip
+        pcm = self.phrases[self.sessions % len(self.phrases)]
+        self.sessions += 1
+        yield ReplaySource(self, pcm)
+
+
+# ----------------- Scripted Recognizer -----------------
+class ScriptedRecognizer:
+    """STT backend that "recognizes" each captured phrase as the next scripted command"""
+
+    name = "scripted"
+    streaming = False
+
+    def __init__(self, commands, delay=0.0):
+        self.commands = list(commands)
+        self.delay = delay
+        self.calls = 0
+        self.heard_bytes = 0
+
+    def transcribe(self, audio):
+        if self.delay:
+            time.sleep(self.delay)
+        self.heard_bytes += len(audio.frame_data)
+        command = self.commands[self.calls % len(self.commands)]
+        self.calls += 1
+        return command
+
+
+# ----------------- Null TTS -----------------
+class NullEngine:
+    """pyttsx3-style engine that speaks nowhere.
+
+    runAndWait() takes as long as the queued words would at `rate` words per
+    minute divided by `speed`; with speed 0 it returns straight away.
+    """
+
+    def __init__(self, rate=160, speed=0.0):
+        self.properties = {"voice": "null", "rate": rate, "volume": 1.0, "voices": []}
+        self.speed = speed
+        self.words = 0
+        self.utterances = 0
+        self._queued = []
+        self._stop = threading.Event()
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def say(self, text):
+        self._queued.append(text)
+
+    def save_to_file(self, text, path):
+        raise RuntimeError("the null engine can't render audio")
+
+    def runAndWait(self):
+        words = sum(len(text.split()) for text in self._queued)
+        self._queued = []
+        self._stop.clear()
+        self.words += words
+        self.utterances += 1
+        if self.speed and words:
+            self._stop.wait(words * 60.0 / self.properties["rate"] / self.speed)
+
+    def stop(self):
+        self._queued = []
+        self._stop.set()
+
+
+# ----------------- Fake Display -----------------
+class FakeDisplay:
+    """Brightness backend for a display that isn't there.
+
+    Every read and write takes `delay` seconds, like a DDC/CI monitor;
+    `history` lists the levels written, so a ramp can be checked.
+    """
+
+    name = "fake display"
+
+    def __init__(self, level=50, delay=0.0, fail=False):
+        self.level = level
+        self.delay = delay
+        self.fail = fail
+        self.reads = 0
+        self.writes = 0
+        self.history = []
+
+    def read(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("the fake display isn't responding")
+        self.reads += 1
+        return self.level
+
+    def write(self, level):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("the fake display isn't responding")
+        self.writes += 1
+        self.level = level
+        self.history.append(level)
+
+
+# ----------------- Fake Mixer -----------------
+class FakeMixer:
+    """Volume backend for a sound card that isn't there; every call takes `delay` seconds"""
+
+    name = "fake mixer"
+
+    def __init__(self, level=50, muted=False, delay=0.0, fail=False):
+        self.level = level
+        self.muted = muted
+        self.delay = delay
+        self.fail = fail
+        self.reads = 0
+        self.writes = 0
+        self.history = []
+
+    def open(self):
+        pass
+
+    def _call(self):
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("the fake mixer isn't responding")
+
+    def read(self):
+        self._call()
+        self.reads += 1
+        return self.level, self.muted
+
+    def write(self, level):
+        self._call()
+        self.writes += 1
+        self.level = level
+        self.history.append(level)
+
+    def set_mute(self, muted):
+        self._call()
+        self.writes += 1
+        self.muted = muted
+        self.history.append("muted" if muted else "unmuted")
+
+
+def write_phrase(path, rate=16000, seed=0):
+    """A short spoken-command-like WAV (with a label file) for the replay microphone"""
+    from vad import write_fixture
+    write_fixture(path, 0.3, 1.1, 1.6, rate=rate, seed=seed)
+    return path
+
+
+if __name__ == "__main__":
+    import tempfile
+    from vad import VoiceActivityDetector, listen
+
+    with tempfile.TemporaryDirectory() as directory:
+        mic = WavReplayMicrophone([write_phrase(os.path.join(directory, "phrase.wav"))]).start()
+        stt = ScriptedRecognizer(["what is the speed of light"])
+        for _ in range(3):
+            with mic.listening() as source:
+                audio = listen(source, VoiceActivityDetector(source.SAMPLE_RATE, noise_floor=150))
+            print(f"{len(audio.frame_data) / 2 / source.SAMPLE_RATE:.2f} s -> {stt.transcribe(audio)!r}")
+        mic.stop()
@@ -0,0 +1,128 @@
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ----------------- Fake Groq Endpoint -----------------
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-stream on purpose (cancel, [DONE]); don't dump tracebacks
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeGroqServer:
+    """Local stand-in for the Groq chat-completions endpoint.
+
+    Serves both plain JSON and server-sent-event responses so the client can be
+    exercised without network access or an API key. `token_delay` spaces out the
+    streamed chunks to mimic generation speed and `delay` holds back the
+    response headers, as a slow start would. `status` may be a list: those
+    statuses are returned first (with `retry_after` set), then 200 from then on.
+    """
+
+    def __init__(self, reply="Hello from the fake server.", token_delay=0.0, status=200, retry_after=None,
+                 host="127.0.0.1", port=0, delay=0.0):
+        self.reply = reply
+        self.token_delay = token_delay
+        self.delay = delay
+        self.statuses = list(status) if isinstance(status, (list, tuple)) else None
+        self.status = 200 if self.statuses is not None else status
+        self.retry_after = retry_after
+        self.requests = []
+        self.connections = set()
+        self._server = _QuietHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/openai/v1/chat/completions"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _next_status(self):
+        if self.statuses:
+            return self.statuses.pop(0)
+        return self.status
+
+    def _make_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                fake.connections.add(self.client_address)
+                self.send_response(405)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append(body)
+                fake.connections.add(self.client_address)
+
+                if fake.delay:
+                    time.sleep(fake.delay)
+                status = fake._next_status()
+                if status != 200:
+                    self._send_json(status, {"error": {"message": "fake error"}})
+                elif body.get("stream"):
+                    self._send_stream()
+                else:
+                    self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": fake.reply}}]})
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if status != 200 and fake.retry_after is not None:
+                    self.send_header("Retry-After", str(fake.retry_after))
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                words = fake.reply.split(" ")
+                for i, word in enumerate(words):
+                    token = word if i == 0 else " " + word
+                    chunk = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                    if fake.token_delay:
+                        time.sleep(fake.token_delay)
+                self._write_chunk(b"data: [DONE]\n\n")
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,389 @@
+import os
+import re
+import json
+import time
+import random
+import socket
+import threading
+from collections import deque
+
+from stats import percentile
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# ----------------- Groq Chat Completions -----------------
+GROQ_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
+GROQ_MODEL = "llama-3.1-8b-instant"
+MAX_TOKENS = 300
+
+# Statuses worth another attempt: rate limiting and transient server trouble
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GroqError(Exception):
+    """Non-200 response from the chat-completions endpoint"""
+
+    def __init__(self, status_code, text):
+        super().__init__(f"HTTP {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+def build_payload(prompt, stream=False):
+    """prompt is either the question text or a full list of chat messages"""
+    messages = prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}]
+    return {
+        "model": GROQ_MODEL,
+        "messages": messages,
+        "max_tokens": MAX_TOKENS,
+        "stream": stream,
+    }
+
+
+def build_headers(api_key):
+    return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+
+def iter_sse_data(lines):
+    """Yield the data payload of each server-sent event until [DONE]"""
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line or line.startswith(":"):
+            continue
+        if line.startswith("data:"):
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+            yield data
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ----------------- Request Timing -----------------
+class RequestStats:
+    """Rolling timing figures for requests made through a GroqClient"""
+
+    def __init__(self, window=200):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=window)
+
+    def record(self, latency, attempts, ok):
+        with self.lock:
+            self.requests += 1
+            self.retries += attempts - 1
+            if not ok:
+                self.failures += 1
+            self.latencies.append(latency)
+
+    def summary(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            result = {"requests": self.requests, "failures": self.failures, "retries": self.retries}
+        if latencies:
+            result["avg_ms"] = sum(latencies) / len(latencies) * 1000
+            result["p50_ms"] = percentile(latencies, 0.5) * 1000
+            result["p95_ms"] = percentile(latencies, 0.95) * 1000
+            result["max_ms"] = latencies[-1] * 1000
+        return result
+
+
+# ----------------- Cancellable Connections -----------------
+# A stop can come while a request is still waiting for its response headers,
+# before there is a response to close. Pooled connections note themselves in
+# the requesting thread's list, so a cancel from another thread can shut down
+# the socket that thread is blocked on.
+_requesting = threading.local()
+
+
+class _TrackedConnection:
+    def request(self, *args, **kwargs):
+        connections = getattr(_requesting, "connections", None)
+        if connections is not None:
+            connections.append(self)
+        return super().request(*args, **kwargs)
+
+
+class _TrackedHTTPConnection(_TrackedConnection, HTTPConnection):
+    pass
+
+
+class _TrackedHTTPSConnection(_TrackedConnection, HTTPSConnection):
+    pass
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections can be shut down mid-request (see abort_connections)"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {"http": _TrackedHTTPConnectionPool,
+                                                   "https": _TrackedHTTPSConnectionPool}
+
+
+def abort_connections(connections):
+    """Shut down the sockets a request went out on, from another thread"""
+    for connection in list(connections):
+        try:
+            # Closing a socket doesn't wake a recv() waiting on it; shutting it down does
+            connection.sock.shutdown(socket.SHUT_RDWR)
+        except Exception:
+            pass
+
+
+# ----------------- Pooled Client -----------------
+class GroqClient:
+    """Long-lived, keep-alive HTTP client for the chat-completions endpoint.
+
+    One requests.Session holds a small connection pool, so follow-up questions
+    reuse the TCP/TLS connection opened by warm_up() or the previous request.
+    Rate limits and transient 5xx/connection errors are retried a bounded
+    number of times with jittered exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, api_key, url=None, timeout=15, max_retries=3, backoff=0.5,
+                 max_backoff=8.0, max_retry_after=20.0, pool_size=4):
+        self.url = url or GROQ_URL
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.stats = RequestStats()
+
+        self.session = requests.Session()
+        self.session.headers.update(build_headers(api_key))
+        adapter = CancellableAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def warm_up(self):
+        """Open a pooled connection ahead of the first question"""
+        started = time.perf_counter()
+        try:
+            self.session.head(self.url, timeout=5).close()
+            print(f"🔥 Groq connection warmed up in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return True
+        except Exception as e:
+            print(f"⚠️ Groq warm-up failed: {e}")
+            return False
+
+    def close(self):
+        self.session.close()
+
+    def _retry_delay(self, attempt, response=None):
+        """Jittered exponential backoff; Retry-After wins when the server sends it"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after + random.uniform(0, self.backoff / 2)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def post(self, payload, stream=False, cancel=None):
+        """POST with retries; returns the final response, raises GroqError if it isn't 200"""
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise GroqError(499, "Request cancelled.")
+            response = None
+            try:
+                response = self.session.post(self.url, data=json.dumps(payload),
+                                             stream=stream, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if cancel is not None and cancel.is_set():
+                    raise  # our own abort, not a network problem
+                if attempt >= self.max_retries:
+                    self.stats.record(time.perf_counter() - started, attempt + 1, False)
+                    raise
+                delay = self._retry_delay(attempt)
+            else:
+                if response.status_code == 200:
+                    return response, started, attempt + 1
+
+                delay = self._retry_delay(attempt, response)
+                if (response.status_code not in RETRY_STATUSES or attempt >= self.max_retries
+                        or delay > self.max_retry_after):
+                    error = GroqError(response.status_code, response.text)
+                    response.close()
+                    self.stats.record(time.perf_counter() - started, attempt + 1, False)
+                    raise error
+                response.close()
+
+            print(f"🔁 Groq retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+                  + (f" (HTTP {response.status_code})" if response is not None else ""))
+            if cancel is not None:
+                if cancel.wait(delay):
+                    raise GroqError(499, "Request cancelled.")
+            else:
+                time.sleep(delay)
+            attempt += 1
+
+    def post_cancellable(self, payload, stream=False, cancel=None):
+        """post() that cancelling `cancel` aborts at once, even before the headers arrive.
+
+        Returns (response, started, attempts, release); call release() once
+        done with the response. Raises GroqError 499 if cancelled.
+        """
+        connections = _requesting.connections = []
+        on_cancel = getattr(cancel, "on_cancel", None)
+        abort = on_cancel(lambda: abort_connections(connections)) if on_cancel else None
+
+        def release():
+            if abort is not None:
+                cancel.remove(abort)
+
+        try:
+            return self.post(payload, stream=stream, cancel=cancel) + (release,)
+        except (requests.RequestException, OSError):
+            release()
+            if cancel is not None and cancel.is_set():
+                raise GroqError(499, "Request cancelled.")
+            raise
+        except Exception:
+            release()
+            raise
+        finally:
+            _requesting.connections = None
+
+    def complete(self, prompt, cancel=None):
+        """Return the full answer text; cancelling `cancel` shuts the connection down at once"""
+        response, started, attempts, release = self.post_cancellable(build_payload(prompt), cancel=cancel)
+        try:
+            with response:
+                text = response.json()["choices"][0]["message"]["content"]
+        except (requests.RequestException, OSError, ValueError):
+            if cancel is not None and cancel.is_set():
+                raise GroqError(499, "Request cancelled.")
+            raise
+        finally:
+            release()
+        latency = time.perf_counter() - started
+        self.stats.record(latency, attempts, True)
+        print(f"⏱️ Groq answered in {latency * 1000:.0f} ms ({attempts} attempt(s))")
+        return text
+
+    def stream_completion(self, prompt, cancel=None):
+        """Yield content deltas of a streaming chat completion as they arrive.
+
+        With a CancelScope as `cancel`, cancelling it shuts the connection down
+        at once, whether the request is still waiting for its headers or
+        already streaming, instead of waiting for the next token to check it.
+        """
+        response, started, attempts, release = self.post_cancellable(build_payload(prompt, stream=True),
+                                                                     stream=True, cancel=cancel)
+        first_token = None
+        try:
+            with response:
+                for data in iter_sse_data(response.iter_lines(chunk_size=None)):
+                    if cancel is not None and cancel.is_set():
+                        break
+                    choice = json.loads(data)["choices"][0]
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        if first_token is None:
+                            first_token = time.perf_counter() - started
+                        yield delta
+        except (requests.RequestException, OSError, ValueError):
+            if cancel is None or not cancel.is_set():
+                raise
+            return  # aborted by the cancel
+        finally:
+            release()
+
+        latency = time.perf_counter() - started
+        self.stats.record(latency, attempts, True)
+        if first_token is not None:
+            print(f"⏱️ Groq first token in {first_token * 1000:.0f} ms, "
+                  f"stream done in {latency * 1000:.0f} ms ({attempts} attempt(s))")
+
+    def stream_sentences(self, prompt, cancel=None):
+        """Yield complete sentences of a streaming chat completion"""
+        splitter = SentenceSplitter()
+        for delta in self.stream_completion(prompt, cancel):
+            for sentence in splitter.feed(delta):
+                yield sentence
+        rest = splitter.flush()
+        if rest and not (cancel is not None and cancel.is_set()):
+            yield rest
+
+
+# ----------------- Sentence Splitting -----------------
+class SentenceSplitter:
+    """Cut a stream of text deltas into complete sentences.
+
+    A sentence ends at '.', '!' or '?' followed by whitespace, or at a newline.
+    Common abbreviations such as "Dr." do not end a sentence.
+    """
+
+    _BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+    _ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "e.g.", "i.e.", "approx."}
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, text):
+        """Add a delta and return the sentences it completed"""
+        self._buffer += text
+        sentences = []
+        start = 0
+        for match in self._BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if not candidate:
+                start = match.end()
+                continue
+            if candidate.rsplit(None, 1)[-1].lower() in self._ABBREVIATIONS:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Return whatever is left once the stream has ended"""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+
+if __name__ == "__main__":
+    from fake_groq import FakeGroqServer
+
+    reply = ("Streaming keeps the assistant responsive. The first sentence is spoken "
+             "while the rest is still generating! Does it work? It does.")
+    with FakeGroqServer(reply, token_delay=0.02, status=[429, 503], retry_after=0.2) as server:
+        client = GroqClient("test-key", url=server.url, backoff=0.1)
+        client.warm_up()
+        started = time.perf_counter()
+        for sentence in client.stream_sentences("demo"):
+            print(f"{(time.perf_counter() - started) * 1000:7.1f} ms  {sentence}")
+        for _ in range(5):
+            client.complete("again")
+        print(client.stats.summary())
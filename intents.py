@@ -0,0 +1,156 @@
+import re
+import time
+from collections import namedtuple
+
+
+# ----------------- Intent Registry -----------------
+Intent = namedtuple("Intent", ["name", "phrases", "priority", "handler", "order"])
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+# Placeholder in a phrase that matches any whole number, as in "volume to {n}"
+NUMBER = "{n}"
+
+
+def tokenize(text):
+    """Split an utterance into lowercase words"""
+    return _WORD_RE.findall(text.lower())
+
+
+def phrase_words(phrase):
+    """Split a trigger phrase into words, keeping number placeholders"""
+    words = []
+    for part in phrase.lower().split():
+        words.extend([NUMBER] if part == NUMBER else tokenize(part))
+    return words
+
+
+class IntentRegistry:
+    """Declarative table of local intents compiled into a word-boundary trie.
+
+    Every phrase is inserted into one trie keyed by whole words, so matching an
+    utterance is a single left-to-right pass whose cost depends on the length of
+    the utterance, not on how many intents are registered. When several phrases
+    match, the highest priority wins; ties go to the intent registered first.
+    A phrase word written {n} matches any whole number.
+    """
+
+    def __init__(self):
+        self._intents = []
+        self._trie = None
+        self._max_depth = 0
+
+    def __len__(self):
+        return len(self._intents)
+
+    def __iter__(self):
+        return iter(self._intents)
+
+    def register(self, name, phrases, handler=None, priority=0):
+        """Add an intent triggered by any of the given phrases"""
+        if isinstance(phrases, str):
+            phrases = [phrases]
+        intent = Intent(name, tuple(phrases), priority, handler, len(self._intents))
+        self._intents.append(intent)
+        self._trie = None
+        return intent
+
+    def intent(self, name, phrases, priority=0):
+        """Decorator form of register()"""
+        def decorator(func):
+            self.register(name, phrases, func, priority)
+            return func
+        return decorator
+
+    def compile(self):
+        """Build the trie; called lazily on the first match after a change"""
+        trie = {}
+        max_depth = 0
+        for intent in self._intents:
+            for phrase in intent.phrases:
+                words = phrase_words(phrase)
+                if not words:
+                    continue
+                node = trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                best = node.get(None)
+                if best is None or _rank(intent) > _rank(best):
+                    node[None] = intent
+                max_depth = max(max_depth, len(words))
+        self._trie = trie
+        self._max_depth = max_depth
+        return self
+
+    def match(self, text):
+        """Return the winning Intent for an utterance, or None"""
+        trie = self._trie
+        if trie is None:
+            trie = self.compile()._trie
+
+        words = tokenize(text)
+        best = None
+        for start in range(len(words)):
+            node = trie
+            for word in words[start:start + self._max_depth]:
+                child = node.get(word)
+                if child is None and word.isdigit():
+                    child = node.get(NUMBER)
+                node = child
+                if node is None:
+                    break
+                found = node.get(None)
+                if found is not None and (best is None or _rank(found) > _rank(best)):
+                    best = found
+        return best
+
+
+def _rank(intent):
+    return intent.priority, -intent.order
+
+
+# ----------------- Micro-benchmark -----------------
+def _synthetic_registry(size):
+    registry = IntentRegistry()
+    for i in range(size):
+        registry.register(f"intent_{i}", [f"command number {i}", f"alias {i} please"], priority=i % 7)
+    registry.register("volume_up", ["increase volume", "volume up"], priority=50)
+    return registry.compile()
+
+
+def _substring_chain(registry):
+    """Equivalent of the old if/elif chain: one `in` test per phrase, in order"""
+    table = [(phrase, intent) for intent in registry for phrase in intent.phrases]
+
+    def match(text):
+        for phrase, intent in table:
+            if phrase in text:
+                return intent
+        return None
+    return match
+
+
+def benchmark(sizes=(25, 100, 250, 500, 1000), rounds=2000):
+    """Time dispatch for growing intent tables against the substring chain"""
+    utterances = [
+        "could you please turn the volume up a little",
+        "what is the capital of france and why is it famous",
+        "hey this is just a sentence that matches nothing at all",
+    ]
+    print(f"{'intents':>8} {'trie us/match':>14} {'chain us/match':>15}")
+    for size in sizes:
+        registry = _synthetic_registry(size)
+        chain = _substring_chain(registry)
+        results = []
+        for matcher in (registry.match, chain):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for text in utterances:
+                    matcher(text)
+            elapsed = time.perf_counter() - start
+            results.append(elapsed / (rounds * len(utterances)) * 1e6)
+        print(f"{len(registry):>8} {results[0]:>14.2f} {results[1]:>15.2f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,128 @@
+import threading
+
+
+def clamp(level):
+    return max(0, min(100, int(level)))
+
+
+# ----------------- Background Level Service -----------------
+class LevelService:
+    """A device level (0-100) changed in the background, from a cached value.
+
+    Callers only record what the level should become and return; one worker
+    thread talks to the slow backend. The level is read once, then cached and
+    updated with every write. Relative requests that come before that first
+    read are summed in `_deltas` and applied once it lands. A failed read or
+    write drops whatever was pending and forgets the level, so the backend is
+    read again when the next request comes in.
+
+    Subclasses set `name`, and implement _read_backend() (runs on the worker,
+    returns what _apply_read() takes), _apply_read(), _pending(), _clear()
+    and _work(), which applies (part of) the pending change. Everything but
+    _read_backend() and _work() is called with `_cond` held.
+    """
+
+    name = "level"
+
+    def __init__(self, backend, on_error=None):
+        self.backend = backend
+        self.on_error = on_error
+        self.level = None    # last level read from or written to the backend
+        self.requests = 0
+        self.merged = 0
+        self.reads = 0
+        self.writes = 0
+        self._deltas = 0     # relative requests waiting for the first read
+        self._failed = False
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+
+    def start(self):
+        """Start the worker; it reads the current level right away"""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    @property
+    def busy(self):
+        with self._cond:
+            return self._busy()
+
+    def _busy(self):
+        # An unknown level is read straight away, unless that just failed
+        return self._pending() or self._deltas != 0 or (self.level is None and not self._failed)
+
+    def _request(self):
+        self.requests += 1
+        if self._busy():
+            self.merged += 1
+
+    def wait_idle(self, timeout=None):
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._busy() or self._stopped, timeout)
+
+    def stats(self):
+        with self._cond:
+            return {"backend": getattr(self.backend, "name", "backend"), "level": self.level,
+                    "requests": self.requests, "merged": self.merged, "reads": self.reads, "writes": self.writes}
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._busy())
+                if self._stopped:
+                    return
+                known = self.level is not None
+            if not known:
+                self._read()
+                continue
+            self._work()
+
+    def _read(self):
+        try:
+            reading = self._read_backend()
+        except Exception as e:
+            self._fail(e)
+            return
+        with self._cond:
+            self.reads += 1
+            self._failed = False
+            self._apply_read(reading)
+            self._cond.notify_all()
+
+    def _fail(self, error, requested=False):
+        print(f"❌ {self.name.capitalize()} error ({getattr(self.backend, 'name', 'backend')}): {error}")
+        with self._cond:
+            requested = requested or self._pending() or self._deltas != 0
+            self._clear()
+            self._deltas = 0
+            self.level = None
+            self._failed = True
+            self._cond.notify_all()
+        # Only report failures someone asked for, not the quiet first read at startup
+        if requested and self.on_error:
+            try:
+                self.on_error(error)
+            except Exception as e:
+                print(f"⚠️ {self.name.capitalize()} error callback failed: {e}")
+
+    # ---- subclass hooks ----
+    def _read_backend(self):
+        raise NotImplementedError
+
+    def _apply_read(self, reading):
+        raise NotImplementedError
+
+    def _pending(self):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _work(self):
+        raise NotImplementedError
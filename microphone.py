@@ -0,0 +1,194 @@
+import math
+import time
+import threading
+from array import array
+from collections import deque
+from contextlib import contextmanager
+
+import speech_recognition as sr
+
+try:
+    import audioop
+except ImportError:
+    audioop = None
+
+
+# ----------------- Continuous Microphone -----------------
+def chunk_rms(data, sample_width=2):
+    """RMS energy of a chunk of 16-bit PCM, same measure speech_recognition uses"""
+    if audioop is not None:
+        return audioop.rms(data, sample_width)
+    samples = array("h", data)
+    if not samples:
+        return 0
+    return int(math.sqrt(sum(s * s for s in samples) / len(samples)))
+
+
+class RingBufferStream:
+    """File-like view over the ring buffer; read() blocks until the next chunk"""
+
+    def __init__(self, mic, start_seq):
+        self.mic = mic
+        self.cursor = start_seq
+
+    def read(self, size=None):
+        chunk, self.cursor = self.mic.next_chunk(self.cursor)
+        return chunk
+
+
+class RingBufferSource(sr.AudioSource):
+    """AudioSource that Recognizer.listen() can read from without opening a device"""
+
+    def __init__(self, mic, start_seq):
+        self.SAMPLE_RATE = mic.sample_rate
+        self.SAMPLE_WIDTH = mic.sample_width
+        self.CHUNK = mic.chunk_size
+        self.stream = RingBufferStream(mic, start_seq)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class ContinuousMicrophone:
+    """Keeps one microphone stream open for the whole session.
+
+    A reader thread copies every chunk into a ring buffer, so listening starts
+    on audio that is already flowing. The energy threshold is calibrated once
+    at startup and then follows the ambient level in the background while
+    nobody is listening, the same way Recognizer's dynamic threshold does.
+    """
+
+    def __init__(self, recognizer, device_index=None, sample_rate=16000, chunk_size=1024,
+                 buffer_seconds=10, preroll_seconds=0.3):
+        self.recognizer = recognizer
+        self.device_index = device_index
+        self.sample_rate = sample_rate
+        self.chunk_size = chunk_size
+        self.sample_width = 2
+        self.preroll_chunks = max(0, int(preroll_seconds * sample_rate / chunk_size))
+
+        max_chunks = int(buffer_seconds * sample_rate / chunk_size)
+        self._ring = deque(maxlen=max_chunks)
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._listeners = 0
+        self._running = False
+        self._microphone = None
+        self._thread = None
+        self.ready = threading.Event()
+        self.timings = {}  # stage -> (started, finished) perf_counter times from start()
+
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def seconds_per_chunk(self):
+        return self.chunk_size / float(self.sample_rate)
+
+    def start(self, calibration_seconds=1.0):
+        """Open the device, calibrate once and start buffering"""
+        started = time.perf_counter()
+        try:
+            self._microphone = sr.Microphone(device_index=self.device_index,
+                                             sample_rate=self.sample_rate, chunk_size=self.chunk_size)
+            self._microphone.__enter__()
+        except Exception:
+            self._microphone = None
+            self.ready.set()  # don't leave listeners waiting on a device that never opened
+            raise
+        self.sample_width = self._microphone.SAMPLE_WIDTH
+        self._running = True
+        self._thread = threading.Thread(target=self._read_loop, name="mic-reader", daemon=True)
+        self._thread.start()
+        opened = time.perf_counter()
+
+        self.calibrate(calibration_seconds)
+        self.timings = {"mic_open": (started, opened), "calibration": (opened, time.perf_counter())}
+        self.ready.set()
+        print(f"🎙️ Microphone open, energy threshold {self.recognizer.energy_threshold:.0f}")
+        return self
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self._microphone is not None:
+            try:
+                self._microphone.__exit__(None, None, None)
+            except Exception:
+                pass
+            self._microphone = None
+
+    def calibrate(self, duration):
+        """One-time ambient calibration from the chunks read during `duration`"""
+        with self._cond:
+            start = self._seq
+        energies = []
+        cursor = start
+        while len(energies) * self.seconds_per_chunk < duration:
+            chunk, cursor = self.next_chunk(cursor)
+            if not chunk:
+                break
+            energies.append(chunk_rms(chunk, self.sample_width))
+        if energies:
+            ambient = sum(energies) / len(energies)
+            self.recognizer.energy_threshold = max(ambient * self.recognizer.dynamic_energy_ratio, 50)
+
+    def next_chunk(self, cursor):
+        """Chunk following sequence number `cursor`; blocks until it has been read"""
+        with self._cond:
+            while self._running and self._seq <= cursor:
+                self._cond.wait(0.5)
+            if not self._running:
+                return b"", cursor
+            oldest = self._seq - len(self._ring)
+            if cursor < oldest:
+                cursor = oldest  # the reader fell behind the ring; skip ahead
+            return self._ring[cursor - oldest], cursor + 1
+
+    @contextmanager
+    def listening(self, preroll=True):
+        """AudioSource for Recognizer.listen(), starting a short pre-roll back (or at the next chunk)"""
+        with self._cond:
+            self._listeners += 1
+            back = self.preroll_chunks if preroll else 0
+            start = max(self._seq - back, self._seq - len(self._ring))
+        try:
+            yield RingBufferSource(self, start)
+        finally:
+            with self._cond:
+                self._listeners -= 1
+
+    def _track_ambient(self, energy):
+        # Same damping formula as Recognizer.listen(), applied between turns
+        recognizer = self.recognizer
+        if not recognizer.dynamic_energy_threshold:
+            return
+        damping = recognizer.dynamic_energy_adjustment_damping ** self.seconds_per_chunk
+        target = energy * recognizer.dynamic_energy_ratio
+        recognizer.energy_threshold = recognizer.energy_threshold * damping + target * (1 - damping)
+
+    def _read_loop(self):
+        stream = self._microphone.stream
+        while self._running:
+            try:
+                chunk = stream.read(self.chunk_size)
+            except Exception as e:
+                print(f"❌ Microphone read error: {e}")
+                break
+            with self._cond:
+                self._ring.append(chunk)
+                self._seq += 1
+                idle = self._listeners == 0
+                self._cond.notify_all()
+            if idle and self.ready.is_set():
+                self._track_ambient(chunk_rms(chunk, self.sample_width))
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
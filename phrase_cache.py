@@ -0,0 +1,101 @@
+import os
+import wave
+import hashlib
+import threading
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+
+# ----------------- Pre-rendered Phrase Audio -----------------
+def wav_duration(path):
+    with wave.open(path, "rb") as wav:
+        return wav.getnframes() / float(wav.getframerate() or 1)
+
+
+class WavPlayer:
+    """Plays a WAV file and blocks until it ends or stop() is called"""
+
+    def __init__(self):
+        self._stop = threading.Event()
+
+    @property
+    def available(self):
+        return winsound is not None
+
+    def play(self, path):
+        """Returns False if playback was cut short"""
+        duration = wav_duration(path)
+        winsound.PlaySound(path, winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        stopped = self._stop.wait(duration)
+        if stopped:
+            winsound.PlaySound(None, 0)
+        return not stopped
+
+    def stop(self):
+        self._stop.set()
+
+    def reset(self):
+        """Re-arm after a stop(); call before starting the next utterance"""
+        self._stop.clear()
+
+
+class PhraseCache:
+    """Disk cache of fixed assistant phrases rendered to WAV.
+
+    Files are named by a hash of the text and the voice/rate/volume they were
+    rendered with, so changing the voice simply misses and re-renders. The
+    directory is only created by the first render, so headless runs and
+    platforms without playback leave nothing behind.
+    """
+
+    def __init__(self, directory="phrase_cache"):
+        self.directory = directory
+        self.voice_key = ""
+        self.hits = 0
+        self.misses = 0
+        self._failed = set()
+
+    def configure(self, engine):
+        """Key future lookups on the engine's current voice settings"""
+        self.voice_key = "|".join(str(engine.getProperty(name)) for name in ("voice", "rate", "volume"))
+
+    def path_for(self, text):
+        digest = hashlib.sha256(f"{self.voice_key}\n{text}".encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.directory, f"{digest}.wav")
+
+    def lookup(self, text):
+        """Path of the rendered phrase, or None on a miss"""
+        path = self.path_for(text)
+        if os.path.exists(path):
+            self.hits += 1
+            return path
+        self.misses += 1
+        return None
+
+    def needs_render(self, text):
+        return text not in self._failed and not os.path.exists(self.path_for(text))
+
+    def render(self, engine, text):
+        """Synthesize text to its cache file with the engine's save_to_file()"""
+        path = self.path_for(text)
+        partial = path + ".part.wav"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            engine.save_to_file(text, partial)
+            engine.runAndWait()
+            os.replace(partial, path)
+            return path
+        except Exception as e:
+            print(f"⚠️ Couldn't pre-render phrase '{text[:30]}': {e}")
+            self._failed.add(text)
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            return None
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
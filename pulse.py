@@ -0,0 +1,82 @@
+import time
+
+
+# ----------------- Pulse Indicator -----------------
+class PulseIndicator:
+    """Listening pulse drawn as two persistent rings on a canvas.
+
+    The rings are created once and only moved with coords(), so a frame
+    allocates no canvas items. A single after() chain drives them: start()
+    while running and stop() while stopped do nothing, so callers can toggle
+    freely without stacking chains. The chain also stops while the window is
+    minimized and picks up again when it is restored.
+    """
+
+    def __init__(self, canvas, x=60, y=60, size=50, swing=20, fps=10):
+        self.canvas = canvas
+        self.x = x
+        self.y = y
+        self.size = size
+        self.swing = swing
+        self.interval = 100
+        self.set_fps(fps)
+        self.active = False
+        self.paused = False
+        self.frames = 0
+        self._after_id = None
+
+        self.outer = canvas.create_oval(0, 0, 0, 0, outline="#4facfe", width=3, state="hidden")
+        self.inner = canvas.create_oval(0, 0, 0, 0, outline="#00f2fe", width=2, state="hidden")
+
+        self.window = canvas.winfo_toplevel()
+        self.window.bind("<Unmap>", self._on_unmap, add="+")
+        self.window.bind("<Map>", self._on_map, add="+")
+
+    def set_fps(self, fps):
+        self.interval = max(1, int(1000 / max(1, fps)))
+
+    def start(self):
+        if self.active:
+            return
+        self.active = True
+        self.canvas.itemconfigure(self.outer, state="normal")
+        self.canvas.itemconfigure(self.inner, state="normal")
+        self._tick()
+
+    def stop(self):
+        self.active = False
+        self._cancel()
+        self.canvas.itemconfigure(self.outer, state="hidden")
+        self.canvas.itemconfigure(self.inner, state="hidden")
+
+    def _cancel(self):
+        if self._after_id is not None:
+            self.canvas.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _draw(self):
+        # Time-based so the pulse keeps the same speed at any frame rate
+        size = self.size + (time.time() * 10) % self.swing
+        x, y = self.x, self.y
+        self.canvas.coords(self.outer, x - size, y - size, x + size, y + size)
+        inner = size - 10
+        self.canvas.coords(self.inner, x - inner, y - inner, x + inner, y + inner)
+
+    def _tick(self):
+        self._after_id = None
+        if not self.active or self.paused:
+            return
+        self._draw()
+        self.frames += 1
+        self._after_id = self.canvas.after(self.interval, self._tick)
+
+    def _on_unmap(self, event):
+        if event.widget is self.window:
+            self.paused = True
+            self._cancel()
+
+    def _on_map(self, event):
+        if event.widget is self.window and self.paused:
+            self.paused = False
+            if self.active and self._after_id is None:
+                self._tick()
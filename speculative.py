@@ -0,0 +1,58 @@
+import queue
+import threading
+import time
+
+_DONE = object()
+
+
+# ----------------- Speculative Answers -----------------
+class Speculation:
+    """Runs a generator on its own thread from the moment it's created.
+
+    The caller can keep working, e.g. decide whether a filler phrase is
+    needed with wait_first(), and then iterate to receive items in order as
+    they arrive. Items produced before anyone iterates are buffered.
+    cancel() ends the iteration at once; the generator is closed as soon as
+    its thread gets control back, and whatever it yields after that is dropped.
+    """
+
+    def __init__(self, generator_func, *args):
+        self.started = time.perf_counter()
+        self.first_at = None
+        self.cancelled = False
+        self._items = queue.Queue()
+        self._first = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(generator_func, args),
+                                        name="speculative-answer", daemon=True)
+        self._thread.start()
+
+    def _run(self, generator_func, args):
+        try:
+            for item in generator_func(*args):
+                if self.cancelled:
+                    break
+                if self.first_at is None:
+                    self.first_at = time.perf_counter() - self.started
+                    self._first.set()
+                self._items.put(item)
+        except Exception as e:
+            print(f"❌ Speculative request failed: {e}")
+        finally:
+            self._first.set()
+            self._items.put(_DONE)
+
+    def cancel(self):
+        self.cancelled = True
+        self._first.set()
+        self._items.put(_DONE)
+
+    def wait_first(self, timeout):
+        """True if the first item (or the end) arrived within timeout seconds"""
+        return self._first.wait(timeout)
+
+    def __iter__(self):
+        while True:
+            item = self._items.get()
+            if item is _DONE:
+                return
+            yield item
@@ -0,0 +1,114 @@
+import sys
+import time
+import importlib
+import threading
+from contextlib import contextmanager
+
+# Taken as early as possible: computer_copilot imports this module first
+LAUNCHED_AT = time.perf_counter()
+
+
+# ----------------- Startup Timeline -----------------
+class StartupTimeline:
+    """Records when each startup phase ran, on which thread and what it imported.
+
+    Times are milliseconds since launch. Each phase also counts how many
+    modules it added to sys.modules, a per-phase summary in the spirit of
+    `python -X importtime`. Nothing is recorded or printed unless enabled.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def _record(self, name, started, modules):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.phases.append((name, started - LAUNCHED_AT, time.perf_counter() - LAUNCHED_AT,
+                                len(sys.modules) - modules, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        started, modules = time.perf_counter(), len(sys.modules)
+        try:
+            yield
+        finally:
+            self._record(name, started, modules)
+
+    def mark(self, name, since=LAUNCHED_AT):
+        """Record a phase that began at `since` (launch by default) and ends now"""
+        self._record(name, since, len(sys.modules))
+
+    def watch(self, name, event, timeout=60):
+        """Record `name` as ready when event is set, without blocking the caller"""
+        if not self.enabled:
+            return
+        started = time.perf_counter()
+
+        def wait():
+            if event.wait(timeout):
+                self._record(name, started, len(sys.modules))
+
+        threading.Thread(target=wait, name=f"watch-{name}", daemon=True).start()
+
+    def report(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        print("⏱️ Startup timeline (ms since launch)")
+        for name, started, finished, modules, thread in phases:
+            imported = f"  +{modules} modules" if modules > 0 else ""
+            print(f"  {started * 1000:8.1f} → {finished * 1000:8.1f}  {(finished - started) * 1000:8.1f} ms  "
+                  f"{name} [{thread}]{imported}")
+
+    def report_when(self, events, timeout=60):
+        """Print the report once every event is set (or the timeout passes)"""
+        if not self.enabled:
+            return
+
+        def wait():
+            deadline = time.perf_counter() + timeout
+            for event in events:
+                event.wait(max(0, deadline - time.perf_counter()))
+            self.report()
+
+        threading.Thread(target=wait, name="startup-report", daemon=True).start()
+
+
+# ----------------- Lazy Imports -----------------
+class LazyModule:
+    """Module proxy that imports on first attribute access.
+
+    `sbc = LazyModule("screen_brightness_control")` keeps call sites
+    unchanged while taking the import off the startup path; load() can be
+    called from a background thread to have it ready before it is first
+    needed.
+    """
+
+    def __init__(self, name, timeline=None):
+        self._name = name
+        self._timeline = timeline
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    if self._timeline is not None:
+                        with self._timeline.phase(f"import {self._name}"):
+                            module = importlib.import_module(self._name)
+                    else:
+                        module = importlib.import_module(self._name)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
@@ -0,0 +1,6 @@
+# ----------------- Percentiles -----------------
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list; 0.0 when it's empty"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
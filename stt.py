@@ -0,0 +1,121 @@
+import json
+
+import speech_recognition as sr
+
+
+# ----------------- Speech-to-Text Backends -----------------
+# Every backend turns one utterance into lowercase text and raises
+# sr.UnknownValueError when nothing was understood, like recognize_google().
+# Streaming backends can also decode while the audio is still being read.
+class GoogleBackend:
+    """Google's web speech API through speech_recognition (needs a network)"""
+
+    name = "google"
+    streaming = False
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+
+    def transcribe(self, audio):
+        return self.recognizer.recognize_google(audio).lower()
+
+
+class VoskStream:
+    """One utterance being decoded chunk by chunk as it is read"""
+
+    def __init__(self, model, sample_rate):
+        import vosk
+        self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
+        self._final = []
+        self.partial = ""
+
+    def feed(self, chunk):
+        """Decode a chunk of 16-bit mono PCM; returns the text heard so far"""
+        if self._recognizer.AcceptWaveform(chunk):
+            text = json.loads(self._recognizer.Result()).get("text", "")
+            if text:
+                self._final.append(text)
+            self.partial = ""
+        else:
+            self.partial = json.loads(self._recognizer.PartialResult()).get("partial", "")
+        return " ".join(self._final + [self.partial]).strip()
+
+    def result(self):
+        text = json.loads(self._recognizer.FinalResult()).get("text", "")
+        text = " ".join(self._final + [text]).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+
+class VoskBackend:
+    """Offline Kaldi models via vosk; streams partial results while listening"""
+
+    name = "vosk"
+    streaming = True
+
+    def __init__(self, model_path):
+        import vosk
+        vosk.SetLogLevel(-1)
+        if not model_path:
+            raise RuntimeError("set VOSK_MODEL_PATH to an unpacked vosk model directory")
+        self.model = vosk.Model(model_path)
+
+    def start_stream(self, sample_rate):
+        return VoskStream(self.model, sample_rate)
+
+    def transcribe(self, audio):
+        stream = self.start_stream(16000)
+        stream.feed(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        return stream.result()
+
+
+class WhisperBackend:
+    """Offline whisper models via faster-whisper; decodes the finished utterance"""
+
+    name = "whisper"
+    streaming = False
+
+    def __init__(self, model_size="base.en", device="cpu", compute_type="int8"):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model_size, device=device, compute_type=compute_type)
+
+    def transcribe(self, audio):
+        import numpy as np
+        pcm = np.frombuffer(audio.get_raw_data(convert_rate=16000, convert_width=2), dtype=np.int16)
+        segments, _ = self.model.transcribe(pcm.astype(np.float32) / 32768.0, language="en", beam_size=1)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        if not text:
+            raise sr.UnknownValueError()
+        return text.lower()
+
+
+def create_backend(name, recognizer, vosk_model=None, whisper_model="base.en"):
+    """Build the configured backend, falling back to Google if it can't load"""
+    try:
+        if name == "vosk":
+            return VoskBackend(vosk_model)
+        if name == "whisper":
+            return WhisperBackend(whisper_model)
+        if name != "google":
+            print(f"⚠️ Unknown STT backend '{name}', using google")
+    except Exception as e:
+        print(f"⚠️ STT backend '{name}' unavailable, using google: {e}")
+    return GoogleBackend(recognizer)
+
+
+class TeeStream:
+    """Wraps an audio source's stream and hands every chunk read to a callback"""
+
+    def __init__(self, stream, on_chunk):
+        self._stream = stream
+        self._on_chunk = on_chunk
+
+    def read(self, size=None):
+        chunk = self._stream.read(size)
+        if chunk:
+            self._on_chunk(chunk)
+        return chunk
+
+    def __getattr__(self, attr):
+        return getattr(self._stream, attr)
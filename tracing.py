@@ -0,0 +1,108 @@
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from stats import percentile
+
+
+# ----------------- Turn Tracing -----------------
+class Tracer:
+    """Per-stage latency spans tagged with the turn they belong to.
+
+    A turn starts when the assistant starts listening for (or receives) a
+    command. Spans are recorded either around a block with span(), or across
+    threads with begin()/end() under a (stage, turn) key. Each stage keeps a
+    rolling window of durations for p50/p95/p99. With `path` set, every span
+    is also appended to that file as one JSON object per line.
+
+    Turns can overlap: a typed command begins its turn while the one before
+    is still queued or running. Callers pass `turn=` for spans that belong to
+    a particular turn; spans without one go with the newest turn. Open spans
+    are dropped by end_turn(), or once they are `window` turns old.
+    """
+
+    def __init__(self, path=None, window=500):
+        self.window = window
+        self.turn = 0
+        self._lock = threading.Lock()
+        self._durations = {}
+        self._open = {}
+        self._file = open(path, "a", encoding="utf-8", buffering=1) if path else None
+
+    def new_turn(self):
+        with self._lock:
+            self.turn += 1
+            # Spans that never ended and whose turn was never closed go eventually
+            self._open = {key: started for key, started in self._open.items()
+                          if key[1] > self.turn - self.window}
+            return self.turn
+
+    def end_turn(self, turn):
+        """Drop a finished turn's spans that never ended (e.g. no speech in chat mode)"""
+        with self._lock:
+            self._open = {key: started for key, started in self._open.items() if key[1] != turn}
+
+    def record(self, stage, started, finished=None, turn=None, **tags):
+        finished = time.perf_counter() if finished is None else finished
+        duration = finished - started
+        with self._lock:
+            turn = self.turn if turn is None else turn
+            samples = self._durations.get(stage)
+            if samples is None:
+                samples = self._durations[stage] = deque(maxlen=self.window)
+            samples.append(duration)
+            if self._file is not None:
+                entry = {"turn": turn, "stage": stage, "ms": round(duration * 1000, 2),
+                         "at": round(time.time(), 3)}
+                entry.update(tags)
+                self._file.write(json.dumps(entry) + "\n")
+        return duration
+
+    @contextmanager
+    def span(self, stage, turn=None, **tags):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, started, turn=turn, **tags)
+
+    def begin(self, stage, turn=None, started=None):
+        """Open a span that another thread will end()"""
+        with self._lock:
+            turn = self.turn if turn is None else turn
+            self._open[(stage, turn)] = time.perf_counter() if started is None else started
+
+    def end(self, stage, turn=None, **tags):
+        """Close a span opened with begin(); does nothing if it isn't open"""
+        with self._lock:
+            turn = self.turn if turn is None else turn
+            started = self._open.pop((stage, turn), None)
+        if started is not None:
+            return self.record(stage, started, turn=turn, **tags)
+        return None
+
+    def percentiles(self):
+        """{stage: {"count", "p50_ms", "p95_ms", "p99_ms"}} over the rolling window"""
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._durations.items()}
+        return {
+            stage: {"count": len(values),
+                    "p50_ms": percentile(values, 0.5) * 1000,
+                    "p95_ms": percentile(values, 0.95) * 1000,
+                    "p99_ms": percentile(values, 0.99) * 1000}
+            for stage, values in snapshot.items()
+        }
+
+    def overlay_text(self, lines=3):
+        """The slowest stages by p95, one 'stage p50/p95 ms' per line"""
+        stages = sorted(self.percentiles().items(), key=lambda item: item[1]["p95_ms"], reverse=True)
+        return "\n".join(f"{stage} {stats['p50_ms']:.0f}/{stats['p95_ms']:.0f} ms"
+                         for stage, stats in stages[:lines])
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,213 @@
+import queue
+import itertools
+import threading
+
+
+# ----------------- Speech Worker -----------------
+PRIORITY_NORMAL = 10
+# Phrase pre-rendering only runs once nothing else is waiting to be spoken
+PRIORITY_RENDER = 100
+
+
+def split_sentences(text):
+    """Split text on '.' the way speak() always has, keeping the full stops"""
+    sentences = [s.strip() + '.' for s in text.split('.') if s.strip()]
+    return sentences or [text]
+
+
+class Utterance:
+    def __init__(self, text, priority, generation, cacheable=False, turn=None):
+        self.text = text
+        self.priority = priority
+        self.generation = generation
+        self.cacheable = cacheable
+        self.turn = turn  # the turn it answers, for tracing
+        self.cancelled = False
+        self.done = threading.Event()
+
+
+class RenderJob:
+    def __init__(self, text):
+        self.text = text
+
+
+class SpeechWorker:
+    """One long-lived thread that owns the TTS engine and speaks queued utterances.
+
+    The engine is created once, on the worker thread, and never re-created.
+    Utterances are served lowest priority number first, FIFO within a priority,
+    so a filler phrase is no longer cut off by the answer queued behind it.
+    interrupt()/flush()/stop() cancel work without touching the engine itself.
+
+    With a PhraseCache and a working WavPlayer, cacheable utterances are played
+    from pre-rendered WAV files; a miss is spoken live and rendered afterwards,
+    once the queue is otherwise empty.
+
+    on_enqueue runs under the worker's lock as each utterance is queued, so a
+    caller's "speaking" flag is set before on_idle can report the queue empty.
+    """
+
+    def __init__(self, engine_factory, on_start=None, on_idle=None, on_enqueue=None, phrase_cache=None,
+                 player=None):
+        self.engine_factory = engine_factory
+        self.on_start = on_start
+        self.on_idle = on_idle
+        self.on_enqueue = on_enqueue
+        self.phrase_cache = phrase_cache
+        self.player = player
+        self.engine = None
+        self.ready = threading.Event()
+
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pending = 0
+        self._current = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def busy(self):
+        return not self._idle.is_set()
+
+    @property
+    def phrase_cache_enabled(self):
+        return self.phrase_cache is not None and self.player is not None and self.player.available
+
+    def enqueue(self, text, priority=PRIORITY_NORMAL, cacheable=False, turn=None):
+        """Queue text behind everything of equal or higher priority"""
+        with self._lock:
+            utterance = Utterance(text, priority, self._generation, cacheable, turn)
+            self._pending += 1
+            self._idle.clear()
+            if self.on_enqueue:
+                self.on_enqueue(utterance)
+        self._queue.put((priority, next(self._counter), utterance))
+        return utterance
+
+    def prerender(self, texts):
+        """Render fixed phrases to the phrase cache in idle time"""
+        if not self.phrase_cache_enabled:
+            return
+        for text in texts:
+            self._queue.put((PRIORITY_RENDER, next(self._counter), RenderJob(text)))
+
+    def flush(self):
+        """Drop every utterance that hasn't started yet"""
+        with self._lock:
+            self._generation += 1
+        kept = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item[2], Utterance):
+                self._finish(item[2], cancelled=True)
+            else:
+                kept.append(item)  # render jobs and the shutdown marker survive a flush
+        for item in kept:
+            self._queue.put(item)
+
+    def interrupt(self):
+        """Cut off the utterance currently playing; queued ones still follow"""
+        with self._lock:
+            current = self._current
+            if current is not None:
+                current.cancelled = True
+        if current is not None and self.player is not None:
+            self.player.stop()
+        if current is not None and self.engine is not None:
+            try:
+                self.engine.stop()
+            except Exception as e:
+                print(f"⚠️ TTS stop error: {e}")
+
+    def stop(self):
+        """Flush the queue and silence the current utterance"""
+        self.flush()
+        self.interrupt()
+
+    def wait_idle(self, timeout=None):
+        return self._idle.wait(timeout)
+
+    def shutdown(self):
+        self.stop()
+        self._queue.put((-1, next(self._counter), None))
+
+    def _finish(self, utterance, cancelled=False):
+        utterance.cancelled = utterance.cancelled or cancelled
+        utterance.done.set()
+        with self._lock:
+            self._pending -= 1
+            idle = self._pending == 0
+            if idle:
+                self._idle.set()
+        if idle and self.on_idle:
+            try:
+                self.on_idle()
+            except Exception as e:
+                print(f"⚠️ Speech idle callback error: {e}")
+
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+        except Exception as e:
+            print(f"❌ TTS engine failed to start: {e}")
+        if self.engine is not None and self.phrase_cache_enabled:
+            self.phrase_cache.configure(self.engine)
+        self.ready.set()
+
+        while True:
+            _, _, utterance = self._queue.get()
+            if utterance is None:
+                break
+
+            if isinstance(utterance, RenderJob):
+                if self.engine is not None and self.phrase_cache.needs_render(utterance.text):
+                    self.phrase_cache.render(self.engine, utterance.text)
+                continue
+
+            with self._lock:
+                stale = utterance.cancelled or utterance.generation != self._generation
+                if not stale:
+                    self._current = utterance
+                    if self.player is not None:
+                        self.player.reset()
+            if stale or self.engine is None:
+                self._finish(utterance, cancelled=True)
+                continue
+
+            try:
+                if self.on_start:
+                    self.on_start(utterance)
+
+                cached = None
+                if utterance.cacheable and self.phrase_cache_enabled:
+                    cached = self.phrase_cache.lookup(utterance.text)
+
+                if cached:
+                    self.player.play(cached)
+                else:
+                    for sentence in split_sentences(utterance.text):
+                        self.engine.say(sentence)
+                    if utterance.cancelled:
+                        self.engine.stop()
+                    else:
+                        self.engine.runAndWait()
+                    if utterance.cacheable and self.phrase_cache_enabled:
+                        self.prerender([utterance.text])
+            except Exception as e:
+                print(f"❌ TTS Error: {e}")
+            finally:
+                with self._lock:
+                    self._current = None
+                self._finish(utterance)
+
+        print("🔇 Speech worker stopped")
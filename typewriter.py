@@ -0,0 +1,107 @@
+import time
+
+
+# ----------------- Typewriter Reveal -----------------
+def word_ends(text, start=0):
+    """Offsets just past each word in text[start:], in one pass"""
+    ends = []
+    in_word = False
+    for i in range(start, len(text)):
+        if text[i].isspace():
+            if in_word:
+                ends.append(i)
+            in_word = False
+        else:
+            in_word = True
+    if in_word:
+        ends.append(len(text))
+    return ends
+
+
+class _Reveal:
+    __slots__ = ("message", "ends", "scanned", "index", "rate", "deadline", "credit")
+
+    def __init__(self, message):
+        self.message = message
+        self.ends = []
+        self.scanned = message.shown
+        self.index = 0
+        self.rate = 1.0
+        self.deadline = None
+        self.credit = 1.0  # first word shows on the first tick
+
+
+class Typewriter:
+    """Reveals chat messages word by word from one shared timer.
+
+    Word offsets are found once as text arrives, and each tick only moves a
+    message's `shown` count to the next offset. The bubble text is then a
+    slice, so revealing an n-word answer costs O(n) in total. A message types
+    at `words_per_second`. With a `budget`, it speeds up so its text appears
+    within that many seconds of arriving. The timer only runs while something
+    is still being revealed.
+    """
+
+    def __init__(self, widget, apply, interval_ms=50, cancelled=None):
+        self.widget = widget
+        self.apply = apply  # apply(message, shown) updates the bubble
+        self.interval_ms = interval_ms
+        self.cancelled = cancelled
+        self._active = {}
+        self._after_id = None
+        self._last_tick = 0.0
+
+    @property
+    def active(self):
+        return len(self._active)
+
+    def show(self, message):
+        """Reveal everything now (instant mode)"""
+        self._active.pop(message.seq, None)
+        self.apply(message, len(message.text))
+
+    def track(self, message, words_per_second, budget=None):
+        """Type out whatever part of message.text isn't shown yet; call again when it grows"""
+        reveal = self._active.get(message.seq)
+        if reveal is None:
+            reveal = self._active[message.seq] = _Reveal(message)
+        reveal.ends.extend(word_ends(message.text, reveal.scanned))
+        reveal.scanned = len(message.text)
+        reveal.rate = max(0.1, words_per_second)
+        reveal.deadline = time.perf_counter() + budget if budget else None
+        if self._after_id is None:
+            self._last_tick = time.perf_counter()
+            self._after_id = self.widget.after(self.interval_ms, self._tick)
+
+    def cancel(self):
+        """Stop revealing; bubbles keep whatever they show so far"""
+        self._active.clear()
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _tick(self):
+        self._after_id = None
+        if self.cancelled is not None and self.cancelled():
+            self._active.clear()
+            return
+
+        now = time.perf_counter()
+        elapsed = now - self._last_tick
+        self._last_tick = now
+        for seq, reveal in list(self._active.items()):
+            remaining = len(reveal.ends) - reveal.index
+            rate = reveal.rate
+            if reveal.deadline is not None:
+                rate = max(rate, remaining / max(reveal.deadline - now, elapsed))
+            reveal.credit += rate * elapsed
+            step = min(int(reveal.credit), remaining)
+            if step:
+                reveal.credit -= step
+                reveal.index += step
+                self.apply(reveal.message, reveal.ends[reveal.index - 1])
+            if reveal.index >= len(reveal.ends):
+                del self._active[seq]
+
+        if self._active:
+            self._after_id = self.widget.after(self.interval_ms, self._tick)
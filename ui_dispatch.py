@@ -0,0 +1,79 @@
+import time
+import threading
+from collections import deque
+
+
+# ----------------- UI Dispatcher -----------------
+class UIDispatcher:
+    """Single queue of UI work drained by the Tk main loop once per frame.
+
+    Background threads only post() callables; nothing touches a widget off the
+    main thread. Each frame runs queued calls in order until the work budget is
+    spent (the rest waits for the next frame), then runs the coalesced calls:
+    post_latest() keeps only the newest call per key, so ten status updates in
+    one frame cost one label configure.
+    """
+
+    def __init__(self, app, frame_ms=16, budget_ms=8):
+        self.app = app
+        self.frame_ms = frame_ms
+        self.budget = budget_ms / 1000.0
+        self._calls = deque()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self.frames = 0
+        self.coalesced = 0
+        self.overruns = 0
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self.app.after(self.frame_ms, self._drain)
+
+    def stop(self):
+        self._running = False
+
+    def post(self, func, *args):
+        """Run func(*args) on the main thread, in posting order"""
+        self._calls.append((func, args))
+
+    def post_latest(self, key, func, *args):
+        """Run func(*args) at the end of the frame, replacing any earlier call with this key"""
+        with self._lock:
+            if key in self._latest:
+                self.coalesced += 1
+            self._latest[key] = (func, args)
+
+    @property
+    def pending(self):
+        return len(self._calls) + len(self._latest)
+
+    def _run(self, func, args):
+        try:
+            func(*args)
+        except Exception as e:
+            print(f"❌ UI update error: {e}")
+
+    def _drain(self):
+        if not self._running:
+            return
+        deadline = time.perf_counter() + self.budget
+        calls = self._calls
+        while calls and time.perf_counter() < deadline:
+            func, args = calls.popleft()
+            self._run(func, args)
+        if calls:
+            self.overruns += 1
+
+        with self._lock:
+            latest, self._latest = self._latest, {}
+        for func, args in latest.values():
+            self._run(func, args)
+
+        self.frames += 1
+        self.app.after(self.frame_ms, self._drain)
+
+    def stats(self):
+        return {"frames": self.frames, "pending": self.pending,
+                "coalesced": self.coalesced, "overruns": self.overruns}
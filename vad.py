@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import wave
+import tempfile
+from collections import deque
+
+import numpy as np
+import speech_recognition as sr
+
+
+# ----------------- Voice Activity Detection -----------------
+# Speech/noise energy ratio needed to call a frame speech, by aggressiveness
+# (0 = let most sound through ... 3 = only clearly louder-than-room speech)
+AGGRESSIVENESS_RATIOS = (1.5, 2.0, 3.0, 4.5)
+
+
+def frame_rms(samples, frame_length):
+    """RMS energy of each whole frame in an int16 array, computed in one pass"""
+    count = len(samples) // frame_length
+    if not count:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:count * frame_length].reshape(count, frame_length).astype(np.float32)
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+class VoiceActivityDetector:
+    """Energy VAD over fixed frames of 16-bit mono PCM with onset/hangover smoothing.
+
+    Frame energies and speech/noise decisions for a whole chunk are computed
+    with NumPy. Speech starts after `onset_ms` of consecutive speech frames
+    and ends after `hangover_ms` of consecutive non-speech frames, so short
+    dips between words don't end the phrase. The noise floor follows the
+    room level while nobody is speaking.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=20, aggressiveness=1, hangover_ms=200,
+                 onset_ms=60, noise_floor=None, min_energy=50):
+        self.sample_rate = sample_rate
+        self.frame_length = max(1, int(sample_rate * frame_ms / 1000))
+        self.frame_seconds = self.frame_length / float(sample_rate)
+        self.ratio = AGGRESSIVENESS_RATIOS[max(0, min(3, aggressiveness))]
+        self.hangover_frames = max(1, int(round(hangover_ms / 1000.0 / self.frame_seconds)))
+        self.onset_frames = max(1, int(round(onset_ms / 1000.0 / self.frame_seconds)))
+        self.min_energy = min_energy
+        self.initial_floor = noise_floor
+        self.reset()
+
+    def reset(self):
+        self.noise_floor = self.initial_floor
+        self.triggered = False
+        self.ended = False
+        self.frames = 0
+        self.speech_start = None  # frame index where speech began
+        self.speech_end = None    # frame index just past the last speech frame
+        self._run = 0             # consecutive speech (before onset) / silence (after) frames
+        self._leftover = np.empty(0, dtype=np.int16)
+
+    @property
+    def threshold(self):
+        return max(self.min_energy, (self.noise_floor or 0) * self.ratio)
+
+    def feed(self, chunk):
+        """Process a chunk of audio; returns True once the end of speech is found"""
+        if self.ended:
+            return True
+        samples = np.concatenate((self._leftover, np.frombuffer(chunk, dtype=np.int16)))
+        energies = frame_rms(samples, self.frame_length)
+        self._leftover = samples[len(energies) * self.frame_length:]
+        if not len(energies):
+            return False
+
+        if self.noise_floor is None:
+            # No calibration given: take the quietest frames of the first chunk
+            self.noise_floor = float(np.percentile(energies, 20))
+        speech = energies > self.threshold
+
+        for i, is_speech in enumerate(speech):
+            index = self.frames + i
+            if not self.triggered:
+                if is_speech:
+                    self._run += 1
+                    if self._run >= self.onset_frames:
+                        self.triggered = True
+                        self.speech_start = index - self._run + 1
+                        self.speech_end = index + 1
+                        self._run = 0
+                else:
+                    self._run = 0
+                    self._track_noise(energies[i])
+            elif is_speech:
+                self._run = 0
+                self.speech_end = index + 1
+            else:
+                self._run += 1
+                self._track_noise(energies[i])
+                if self._run >= self.hangover_frames:
+                    self.ended = True
+                    break
+        self.frames += len(energies)
+        return self.ended
+
+    def _track_noise(self, energy):
+        # Fall quickly when the room gets quieter, rise slowly when it gets louder
+        rate = 0.3 if energy < self.noise_floor else 0.02
+        self.noise_floor += (energy - self.noise_floor) * rate
+
+
+def listen(source, detector, timeout=5, max_seconds=30, preroll_ms=300):
+    """Record one phrase from an AudioSource, ending it as soon as the VAD hears it end.
+
+    Drop-in for Recognizer.listen(): raises sr.WaitTimeoutError when no speech
+    starts within `timeout` seconds and returns sr.AudioData. There's no fixed
+    phrase limit beyond `max_seconds` as a safety cap.
+    """
+    detector.reset()
+    chunk_seconds = source.CHUNK / float(source.SAMPLE_RATE)
+    preroll = deque(maxlen=max(1, int(preroll_ms / 1000.0 / chunk_seconds)))
+    frames = []
+    waited = 0.0
+
+    while True:
+        chunk = source.stream.read(source.CHUNK)
+        if not chunk:
+            break  # stream closed
+        ended = detector.feed(chunk)
+        if frames or detector.triggered:
+            if not frames:
+                frames.extend(preroll)
+            frames.append(chunk)
+            if ended or len(frames) * chunk_seconds >= max_seconds:
+                break
+        else:
+            preroll.append(chunk)
+            waited += chunk_seconds
+            if timeout and waited > timeout:
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+    if not frames:
+        raise sr.WaitTimeoutError("audio stream closed before a phrase started")
+    return sr.AudioData(b"".join(frames), source.SAMPLE_RATE, source.SAMPLE_WIDTH)
+
+
+# ----------------- WAV Replay Harness -----------------
+def read_wav(path):
+    """16-bit PCM samples (first channel) and sample rate of a WAV file"""
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM is supported")
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+        return samples[::wav.getnchannels()], wav.getframerate()
+
+
+def read_label(path):
+    """Reference (start, end) of speech in seconds from a sidecar .txt, if any"""
+    label = os.path.splitext(path)[0] + ".txt"
+    if not os.path.exists(label):
+        return None
+    with open(label) as f:
+        start, end = f.read().split()[:2]
+    return float(start), float(end)
+
+
+def replay(path, chunk_size=1024, preroll_ms=300, **vad_options):
+    """Feed a WAV file through the VAD chunk by chunk, as the microphone would"""
+    samples, rate = read_wav(path)
+    detector = VoiceActivityDetector(sample_rate=rate, **vad_options)
+    chunk_seconds = chunk_size / float(rate)
+    endpoint = None
+    busy = 0.0
+    for offset in range(0, len(samples), chunk_size):
+        started = time.perf_counter()
+        ended = detector.feed(samples[offset:offset + chunk_size].tobytes())
+        busy += time.perf_counter() - started
+        if ended:
+            # The decision is available once this chunk has been captured
+            endpoint = (offset + chunk_size) / float(rate)
+            break
+
+    result = {"file": os.path.basename(path), "endpoint": endpoint,
+              "cpu_ms_per_chunk": busy * 1000 / max(1, detector.frames * detector.frame_length / chunk_size)}
+    label = read_label(path)
+    if label is None or detector.speech_start is None:
+        result.update(latency_ms=None, clipped=1.0 if label else None)
+        return result
+
+    start, end = label
+    captured_start = max(0.0, detector.speech_start * detector.frame_seconds - preroll_ms / 1000.0)
+    captured_end = endpoint if endpoint is not None else len(samples) / float(rate)
+    # Clipping: reference speech outside the captured segment, as a fraction of it
+    clipped = max(0.0, captured_start - start) + max(0.0, end - captured_end)
+    result.update(latency_ms=(captured_end - end) * 1000 if endpoint is not None else None,
+                  clipped=min(1.0, clipped / max(end - start, 1e-6)), chunk_seconds=chunk_seconds)
+    return result
+
+
+def write_fixture(path, speech_start, speech_end, duration, rate=16000, noise=150, level=4000, pause=None, seed=0):
+    """Synthetic fixture: room noise plus a syllable-modulated voiced tone, with a label file"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * rate)) / float(rate)
+    audio = rng.normal(0, noise, len(t))
+    voiced = (t >= speech_start) & (t < speech_end)
+    if pause:
+        voiced &= ~((t >= pause[0]) & (t < pause[1]))
+    syllables = 0.6 + 0.4 * np.abs(np.sin(2 * np.pi * 2.5 * t))
+    tone = np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t)
+    audio += voiced * level * syllables * tone
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.clip(audio, -32768, 32767).astype(np.int16).tobytes())
+    with open(os.path.splitext(path)[0] + ".txt", "w") as f:
+        f.write(f"{speech_start} {speech_end}\n")
+
+
+def synthetic_fixtures(directory):
+    specs = [
+        ("short_command", 0.4, 1.1, 2.5, {}),
+        ("long_question", 0.5, 9.0, 11.0, {"pause": (4.0, 4.12)}),
+        ("quiet_speaker", 0.3, 1.6, 3.0, {"level": 900}),
+        ("noisy_room", 0.6, 2.0, 3.5, {"noise": 600}),
+        ("pause_between_words", 0.4, 2.4, 4.0, {"pause": (1.2, 1.35)}),
+    ]
+    paths = []
+    for i, (name, start, end, duration, options) in enumerate(specs):
+        path = os.path.join(directory, f"{name}.wav")
+        write_fixture(path, start, end, duration, seed=i, **options)
+        paths.append(path)
+    return paths
+
+
+def run_harness(paths, **vad_options):
+    results = [replay(path, **vad_options) for path in paths]
+    print(f"{'fixture':<24}{'endpoint s':>11}{'latency ms':>12}{'clipped %':>11}{'cpu ms/chunk':>14}")
+    for r in results:
+        endpoint = f"{r['endpoint']:.2f}" if r["endpoint"] is not None else "-"
+        latency = f"{r['latency_ms']:.0f}" if r.get("latency_ms") is not None else "-"
+        clipped = f"{r['clipped'] * 100:.1f}" if r.get("clipped") is not None else "-"
+        print(f"{r['file']:<24}{endpoint:>11}{latency:>12}{clipped:>11}{r['cpu_ms_per_chunk']:>14.3f}")
+
+    # Endpoints that fired before the speech ended show up as clipping instead
+    latencies = sorted(r["latency_ms"] for r in results if r.get("latency_ms") is not None and r["latency_ms"] >= 0)
+    labelled = [r for r in results if r.get("clipped") is not None]
+    if latencies:
+        print(f"endpoint latency: mean {sum(latencies) / len(latencies):.0f} ms, "
+              f"max {latencies[-1]:.0f} ms over {len(latencies)} fixtures")
+    if labelled:
+        rate = sum(1 for r in labelled if r["clipped"] > 0.01) / float(len(labelled))
+        print(f"clipping rate: {rate * 100:.0f}% of fixtures lost more than 1% of their speech")
+    return results
+
+
+if __name__ == "__main__":
+    # python vad.py [fixture.wav ...]   (each fixture may have a "start end" seconds .txt beside it)
+    # With no arguments, synthetic fixtures are generated and replayed.
+    wav_paths = sys.argv[1:]
+    if wav_paths:
+        run_harness(wav_paths)
+    else:
+        with tempfile.TemporaryDirectory() as fixture_dir:
+            for level in range(4):
+                print(f"\naggressiveness {level}")
+                run_harness(synthetic_fixtures(fixture_dir), aggressiveness=level)
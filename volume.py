@@ -0,0 +1,245 @@
+import re
+import sys
+import time
+import shutil
+import subprocess
+
+from level_service import LevelService, clamp
+
+
+# ----------------- Mixer Backends -----------------
+# Every backend has open() (called once, on the volume thread), read() ->
+# (level 0-100, muted), write(level) and set_mute(muted), and raises on failure.
+class PycawBackend:
+    """Windows Core Audio master volume of the default output device, through pycaw"""
+
+    name = "pycaw"
+
+    def __init__(self):
+        self.endpoint = None
+
+    def open(self):
+        from ctypes import cast, POINTER
+        import comtypes
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+        comtypes.CoInitialize()  # COM objects belong to the thread that made them
+        interface = AudioUtilities.GetSpeakers().Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        self.endpoint = cast(interface, POINTER(IAudioEndpointVolume))
+
+    def read(self):
+        return int(round(self.endpoint.GetMasterVolumeLevelScalar() * 100)), bool(self.endpoint.GetMute())
+
+    def write(self, level):
+        self.endpoint.SetMasterVolumeLevelScalar(level / 100.0, None)
+
+    def set_mute(self, muted):
+        self.endpoint.SetMute(int(muted), None)
+
+
+class PulseBackend:
+    """Default PulseAudio/PipeWire sink, through pactl"""
+
+    name = "pulse"
+    SINK = "@DEFAULT_SINK@"
+
+    def open(self):
+        if not shutil.which("pactl"):
+            raise RuntimeError("pactl not found")
+
+    def read(self):
+        volume = self._pactl("get-sink-volume", self.SINK)
+        mute = self._pactl("get-sink-mute", self.SINK)
+        return parse_percent(volume), "yes" in mute.lower()
+
+    def write(self, level):
+        self._pactl("set-sink-volume", self.SINK, f"{level}%")
+
+    def set_mute(self, muted):
+        self._pactl("set-sink-mute", self.SINK, "1" if muted else "0")
+
+    def _pactl(self, *args):
+        return subprocess.run(["pactl", *args], capture_output=True, text=True, check=True, timeout=2).stdout
+
+
+class AlsaBackend:
+    """ALSA mixer control (Master by default), through amixer"""
+
+    name = "alsa"
+
+    def __init__(self, control="Master"):
+        self.control = control
+
+    def open(self):
+        if not shutil.which("amixer"):
+            raise RuntimeError("amixer not found")
+
+    def read(self):
+        # -M: the mapped volume scale, which matches what the desktop's slider shows
+        output = self._amixer("-M", "get", self.control)
+        return parse_percent(output), "[off]" in output
+
+    def write(self, level):
+        self._amixer("-q", "-M", "set", self.control, f"{level}%")
+
+    def set_mute(self, muted):
+        self._amixer("-q", "set", self.control, "mute" if muted else "unmute")
+
+    def _amixer(self, *args):
+        return subprocess.run(["amixer", *args], capture_output=True, text=True, check=True, timeout=2).stdout
+
+
+MIXERS = {"pycaw": PycawBackend, "pulse": PulseBackend, "alsa": AlsaBackend}
+
+
+def create_mixer(name="auto"):
+    """The configured mixer backend; auto picks pycaw on Windows, else pactl if installed, else amixer"""
+    if name not in MIXERS:
+        if name != "auto":
+            print(f"⚠️ Unknown volume backend '{name}', picking one automatically")
+        if sys.platform == "win32":
+            name = "pycaw"
+        else:
+            name = "pulse" if shutil.which("pactl") else "alsa"
+    return MIXERS[name]()
+
+
+def parse_percent(text):
+    match = re.search(r"(\d+)%", text)
+    if not match:
+        raise ValueError(f"no volume level in {text.strip()!r}")
+    return int(match.group(1))
+
+
+# ----------------- Volume Service -----------------
+class VolumeService(LevelService):
+    """Sets the output volume in the background, from a cached level.
+
+    set(), step() and mute() only record what the volume should become and
+    return. The mixer is read once, then the level and mute state are
+    cached. The worker waits `coalesce_ms` after a request before writing,
+    so a burst of "volume up" turns into one mixer write of the combined
+    level. Changing the level unmutes, as the volume keys do.
+    """
+
+    name = "volume"
+
+    def __init__(self, mixer, coalesce_ms=50, on_error=None):
+        super().__init__(mixer, on_error)
+        self.coalesce_seconds = coalesce_ms / 1000.0
+        self.muted = None
+        self._level_target = None
+        self._mute_target = None
+        self._inflight = None  # level being written to the mixer right now
+        self._opened = False
+
+    def set(self, level):
+        """Head for an absolute level (0-100), replacing any pending change"""
+        with self._cond:
+            self._request()
+            self._deltas = 0
+            self._level_target = clamp(level)
+            self._mute_target = False
+            self._cond.notify_all()
+            return self._level_target
+
+    def step(self, delta):
+        """Move the level by `delta` percent; returns the new target if the level is known"""
+        with self._cond:
+            self._request()
+            self._mute_target = False
+            if self.level is None:
+                self._deltas += delta
+                self._cond.notify_all()
+                return None
+            # A step during a slow write builds on the level being written, not the old one
+            base = self._level_target
+            if base is None:
+                base = self._inflight if self._inflight is not None else self.level
+            self._level_target = clamp(base + delta)
+            self._cond.notify_all()
+            return self._level_target
+
+    def mute(self, muted=True):
+        with self._cond:
+            self._request()
+            self._mute_target = bool(muted)
+            self._cond.notify_all()
+
+    def stats(self):
+        stats = super().stats()
+        with self._cond:
+            stats["muted"] = self.muted
+        return stats
+
+    def _read_backend(self):
+        if not self._opened:
+            self.backend.open()
+            self._opened = True
+        return self.backend.read()
+
+    def _apply_read(self, reading):
+        level, muted = reading
+        self.level, self.muted = clamp(level), bool(muted)
+        if self._deltas:
+            self._level_target = clamp(self.level + self._deltas)
+            self._deltas = 0
+
+    def _pending(self):
+        return self._level_target is not None or self._mute_target is not None or self._inflight is not None
+
+    def _clear(self):
+        self._level_target = None
+        self._mute_target = None
+        self._inflight = None
+
+    def _work(self):
+        """Let the rest of a burst arrive, then write it all at once"""
+        time.sleep(self.coalesce_seconds)
+        with self._cond:
+            level, self._level_target = self._level_target, None
+            muted, self._mute_target = self._mute_target, None
+            if level is not None and level != self.level:
+                self._inflight = level
+        try:
+            if self._inflight is not None:
+                self.backend.write(level)
+                with self._cond:
+                    self.writes += 1
+                    self.level = level
+                    self._inflight = None
+            if muted is not None and muted != self.muted:
+                self.backend.set_mute(muted)
+                with self._cond:
+                    self.writes += 1
+                    self.muted = muted
+        except Exception as e:
+            self._fail(e, requested=True)
+            return
+        with self._cond:
+            self._cond.notify_all()
+
+
+if __name__ == "__main__":
+    # python volume.py [auto|pycaw|pulse|alsa]   -- with no argument, a fake mixer with 30 ms per call
+    from fake_devices import FakeMixer
+
+    mixer = create_mixer(sys.argv[1]) if len(sys.argv) > 1 else FakeMixer(level=40, delay=0.03)
+    service = VolumeService(mixer).start()
+    service.wait_idle(5)
+    print(f"start:         {service.stats()}")
+
+    started = time.perf_counter()
+    for _ in range(5):
+        service.step(10)
+    handler = time.perf_counter() - started
+    service.wait_idle(5)
+    print(f"5 x volume up: {handler * 1000:.2f} ms in the command handler, "
+          f"settled in {(time.perf_counter() - started) * 1000:.0f} ms, {service.stats()}")
+
+    service.mute()
+    service.wait_idle(5)
+    service.set(40)
+    service.wait_idle(5)
+    print(f"mute, set 40:  {service.stats()}")
+    service.stop()